@@ -1,25 +1,53 @@
 import os
 import re
 import math
+import heapq
+import random
+import hashlib
 import time
 import json
 import logging
 import asyncio
+import threading
 import inspect
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
 from datetime import datetime, timedelta, time as dtime, date
 from zoneinfo import ZoneInfo
-from typing import Dict, List, Any, Tuple, Optional
+from typing import Dict, List, Any, Tuple, Optional, Iterable, Iterator, Sequence
 from tomorrow_breakout import (
-    build_breakout_ready_list,
+    is_breakout_ready,
     compute_breakout_score,
     compute_accumulation_score,
     compute_v5_entry_score,
 )
 
+import httpx
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def _json_loads(raw: bytes) -> Any:
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        # orjson NaN/Infinity kabul etmez; stdlib json.dump ile yazılmış state/history dosyaları bunları içerebilir
+        return json.loads(raw)
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj)
+
 from telegram import Update
 from telegram.constants import ParseMode
 from telegram.ext import Application, CommandHandler, ContextTypes, MessageHandler, filters
+from telegram.request import HTTPXRequest
 
 # ================================
 # LOGGING SETUP
@@ -34,6 +62,9 @@ logging.basicConfig(
 
 logger = logging.getLogger("TAIPO_PRO_INTEL")
 
+# Tek NaN sentinel: satır başına float("nan") üretmek yerine (NaN testi: x != x)
+_NAN = float("nan")
+
 
 # ==========================
 # MOMO PRIME BALİNA (SAFE IMPORT)
@@ -121,17 +152,11 @@ TRADE_LOG_FILE = os.path.join(
 # Config
 # =========================================================
 TZ = ZoneInfo(os.getenv("TZ", "Europe/Istanbul"))
-LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 UNIVERSE_TICKERS = os.getenv("UNIVERSE_TICKERS", "").strip()
 
 if not UNIVERSE_TICKERS:
     # fallback: UNIVERSE boşsa BIST200 listesini kullan
     UNIVERSE_TICKERS = os.getenv("BIST200_TICKERS", "").strip()
-logging.basicConfig(
-    level=LOG_LEVEL,
-    format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-)
-logger = logging.getLogger("TAIPO_PRO_INTEL")
 
 # ===============================
 # Runtime caches (RAM)
@@ -150,8 +175,38 @@ BOT_VERSION = os.getenv(
     "v1.7.0-premium-yahoo-bootstrap-tradingdaykey-torpil-faz2-whale-stable-rejim"
 ).strip() or "v1.7.0-premium-yahoo-bootstrap-tradingdaykey-torpil-faz2-whale-stable-rejim"
 
+# Telegram Bot API gönderim havuzu (PTB default'u ile aynı: 256; getUpdates ayrı 1 bağlantı)
+TG_POOL_SIZE = int(os.getenv("TG_POOL_SIZE", "256"))
+TG_READ_TIMEOUT = float(os.getenv("TG_READ_TIMEOUT", "30"))
+# Webhook modu: WEBHOOK_URL set ise push (run_webhook), değilse long polling
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "").strip()
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "").strip()
+WEBHOOK_PORT = int(os.getenv("PORT", "8080"))
+# Ortak hız sınırı (Telegram ~30 msg/s; TV scanner 429 döndürmesin)
+TG_RATE_PER_SEC = float(os.getenv("TG_RATE_PER_SEC", "25"))
+TV_RATE_PER_SEC = float(os.getenv("TV_RATE_PER_SEC", "5"))
+
 TV_SCAN_URL = "https://scanner.tradingview.com/turkey/scan"
-TV_TIMEOUT = 12
+# (connect, read) ayrı: bağlantı kurulamıyorsa 12 sn beklemeden düş
+TV_CONNECT_TIMEOUT = float(os.getenv("TV_CONNECT_TIMEOUT", "3"))
+TV_READ_TIMEOUT = float(os.getenv("TV_READ_TIMEOUT", "8"))
+# Circuit breaker: art arda N tam başarısız tarama → cooldown boyunca direkt {}
+TV_BREAKER_FAILS = int(os.getenv("TV_BREAKER_FAILS", "3"))
+TV_BREAKER_COOLDOWN_SEC = int(os.getenv("TV_BREAKER_COOLDOWN_SEC", "60"))
+TV_MAX_CONCURRENCY = int(os.getenv("TV_MAX_CONCURRENCY", "4"))  # aynı anda uçuşan scanner POST sayısı
+TV_RETRY_CAP_SEC = float(os.getenv("TV_RETRY_CAP_SEC", "8"))  # tek retry beklemesinin üst sınırı
+TV_HTTP2 = os.getenv("TV_HTTP2", "1").strip() != "0"  # shard POST'ları tek soket üstünde multiplex (httpx[http2])
+TV_SHARD_SIZE = int(os.getenv("TV_SHARD_SIZE", "50"))  # büyük listeler bu boyutta paralel parçalara bölünür (0 → kapalı)
+TV_CACHE_TTL_SEC = int(os.getenv("TV_CACHE_TTL_SEC", "30"))  # aynı sembol seti için kısa cache
+TV_CACHE_MIN_COVERAGE = float(os.getenv("TV_CACHE_MIN_COVERAGE", "0.8"))  # bu orandan az sembol döndüyse cache'leme
+TV_CACHE_MAX_ENTRIES = max(1, int(os.getenv("TV_CACHE_MAX_ENTRIES", "64")))  # RAM cache LRU üst sınırı
+TV_DISK_CACHE_TTL_SEC = int(os.getenv("TV_DISK_CACHE_TTL_SEC", "60"))  # restart sonrası da geçerli disk cache (0 → kapalı)
+XU100_CACHE_TTL_SEC = int(os.getenv("XU100_CACHE_TTL_SEC", "30"))  # aynı dakikadaki job/komutlar tek özeti paylaşsın
+
+# /radar arka plan snapshot (BIST200 tek POST ile önceden ısıtılır)
+RADAR_SNAPSHOT_ENABLED = os.getenv("RADAR_SNAPSHOT_ENABLED", "1").strip() == "1"
+RADAR_SNAPSHOT_INTERVAL_MIN = int(os.getenv("RADAR_SNAPSHOT_INTERVAL_MIN", "10"))
+RADAR_SNAPSHOT_MAX_AGE_SEC = int(os.getenv("RADAR_SNAPSHOT_MAX_AGE_SEC", "900"))
 
 # -----------------------------
 # Alarm config
@@ -176,13 +231,6 @@ EOD_HOUR = int(os.getenv("EOD_HOUR", "17"))
 EOD_MINUTE = int(os.getenv("EOD_MINUTE", "30"))
 TOMORROW_DELAY_MIN = int(os.getenv("TOMORROW_DELAY_MIN", "2"))
 
-# ===============================
-# Runtime caches (in-memory)
-# ===============================
-
-TOMORROW_CHAINS = {}
-MOMO_CACHE = {}
-
 # =========================================================
 # Tomorrow Follow (2-day chain tracking)
 # =========================================================
@@ -200,6 +248,15 @@ TOMORROW_CHAIN_MAX_AGE = int(os.getenv("TOMORROW_CHAIN_MAX_AGE", "2"))
 
 WATCHLIST_MAX = int(os.getenv("WATCHLIST_MAX", "12"))
 VOLUME_TOP_N = int(os.getenv("VOLUME_TOP_N", "50"))
+try:
+    TOPN_THRESHOLD_FACTOR = float(os.getenv("TOPN_THRESHOLD_FACTOR", "1.00"))
+except Exception:
+    TOPN_THRESHOLD_FACTOR = 1.00
+if TOPN_THRESHOLD_FACTOR <= 0:
+    TOPN_THRESHOLD_FACTOR = 1.00
+
+MOMO_START_HM = (int(os.getenv("MOMO_START_HOUR", "10")), int(os.getenv("MOMO_START_MINUTE", "0")))
+MOMO_END_HM = (int(os.getenv("MOMO_END_HOUR", "18")), int(os.getenv("MOMO_END_MINUTE", "0")))
 
 DATA_DIR = os.getenv("DATA_DIR", "/var/data").strip() or "/var/data"
 # ===============================
@@ -251,6 +308,7 @@ YAHOO_TIMEOUT = int(os.getenv("YAHOO_TIMEOUT", "15"))
 YAHOO_SLEEP_SEC = float(os.getenv("YAHOO_SLEEP_SEC", "0.15"))
 YAHOO_MAX_ATTEMPTS = int(os.getenv("YAHOO_MAX_ATTEMPTS", "3"))
 YAHOO_BAD_TTL_SEC = int(os.getenv("YAHOO_BAD_TTL_SEC", "21600"))  # 6 saat
+YAHOO_BOOTSTRAP_WORKERS = int(os.getenv("YAHOO_BOOTSTRAP_WORKERS", "4"))  # paralel Yahoo fetch
 
 YAHOO_UA = os.getenv(
     "YAHOO_UA",
@@ -287,7 +345,7 @@ def _days_for_layer(layer: str) -> int:
 # Yahoo bad symbol cache
 # ===============================
 
-_YAHOO_BAD_SYMBOLS: Dict[str, float] = {}  # sym -> ts
+_YAHOO_BAD_SYMBOLS: Dict[str, float] = {}  # sym -> monotonic ts
 
 
 def _yahoo_is_bad(sym: str) -> bool:
@@ -295,7 +353,7 @@ def _yahoo_is_bad(sym: str) -> bool:
     if not ts:
         return False
 
-    if time.time() - ts >= YAHOO_BAD_TTL_SEC:
+    if time.monotonic() - ts >= YAHOO_BAD_TTL_SEC:
         _YAHOO_BAD_SYMBOLS.pop(sym, None)
         return False
 
@@ -303,7 +361,7 @@ def _yahoo_is_bad(sym: str) -> bool:
 
 
 def _yahoo_mark_bad(sym: str) -> None:
-    _YAHOO_BAD_SYMBOLS[sym] = time.time()
+    _YAHOO_BAD_SYMBOLS[sym] = time.monotonic()
 
 
 # Whale
@@ -388,7 +446,6 @@ R0_ALLOW_REGIMES = [r.strip().upper() for r in os.getenv(
 LAST_ALARM_TS: Dict[str, float] = {}
 WHALE_SENT_DAY: Dict[str, int] = {}
 LAST_REGIME: Optional[Dict[str, Any]] = None
-TOMORROW_CHAINS: Dict[str, Any] = {}
 
 # =========================================================
 # Helpers
@@ -402,13 +459,7 @@ def get_ticker_rows_days(ticker: str, days_window: int) -> Optional[List[Dict[st
     if t.endswith(".IS"):
         t = t[:-3]
 
-    price_hist = _load_json(PRICE_HISTORY_FILE)
-    vol_hist = _load_json(VOLUME_HISTORY_FILE)
-
-    if not isinstance(price_hist, dict) or not isinstance(vol_hist, dict):
-        return None
-
-    all_days = sorted(set(list(price_hist.keys()) + list(vol_hist.keys())))
+    price_hist, vol_hist, all_days = load_history_readonly()
     if not all_days:
         return None
 
@@ -445,11 +496,11 @@ def get_ticker_rows_days(ticker: str, days_window: int) -> Optional[List[Dict[st
 
 def calc_band_pct_from_closes(closes: List[float]) -> float:
     if not closes:
-        return float("nan")
+        return _NAN
     mn = min(closes)
     mx = max(closes)
     if mn <= 0:
-        return float("nan")
+        return _NAN
     return ((mx - mn) / mn) * 100.0
 
 
@@ -509,10 +560,15 @@ def open_or_update_tomorrow_chain(day_key: str, tom_rows: List[Dict[str, Any]])
         logger.warning("open_or_update_tomorrow_chain failed: %s", e)
 
 def safe_float(x: Any) -> float:
+    if type(x) is float:
+        return x
     try:
         return float(x)
     except Exception:
-        return float("nan")
+        return _NAN
+
+
+_PERF_ROW_FMT = "{:<5} {:<11}  {:>7}  {:>7}".format
 
 
 def build_tomorrow_altin_perf_section(all_rows: list) -> str:
@@ -522,12 +578,6 @@ def build_tomorrow_altin_perf_section(all_rows: list) -> str:
     HTML döner (<pre> dahil). Hata olursa "" döner.
     """
     try:
-        all_map = {
-            (r.get("ticker") or "").strip(): r
-            for r in (all_rows or [])
-            if (r.get("ticker") or "").strip()
-        }
-
         if not TOMORROW_CHAINS:
             return ""
 
@@ -553,13 +603,22 @@ def build_tomorrow_altin_perf_section(all_rows: list) -> str:
                 altin_tickers.append(t)
 
         if not altin_tickers:
-            altin_tickers = list(ref_close_map.keys())[:6]
+            altin_tickers = list(islice(ref_close_map, 6))
 
         if not altin_tickers:
             return ""
+        altin_tickers = altin_tickers[:6]
+
+        # 200 satırlık tam map yerine sadece ALTIN hisseleri için tek tur
+        wanted = set(altin_tickers)
+        all_map: Dict[str, Dict[str, Any]] = {}
+        for r in (all_rows or []):
+            t = (r.get("ticker") or "").strip()
+            if t in wanted:
+                all_map[t] = r
 
         perf_lines = []
-        for t in altin_tickers[:6]:
+        for t in altin_tickers:
             ref_close = safe_float(ref_close_map.get(t))
             now_row = all_map.get(t) or {}
             now_close = safe_float(now_row.get("close"))
@@ -584,13 +643,12 @@ def build_tomorrow_altin_perf_section(all_rows: list) -> str:
             return ""
 
         header = "\n\n🌙 <b>TOMORROW • ALTIN (Canlı)</b>\n"
-        lines = []
-        lines.append("HIS   Δ%          NOW      REF")
-        lines.append("-------------------------------")
-        for (t, dd_s, now_s, ref_s) in perf_lines:
-            lines.append(f"{t:<5} {dd_s:<11}  {now_s:>7}  {ref_s:>7}")
-
-        return header + "<pre>" + "\n".join(lines) + "</pre>"
+        body = "\n".join([
+            "HIS   Δ%          NOW      REF",
+            "-------------------------------",
+            *(_PERF_ROW_FMT(*p) for p in perf_lines),
+        ])
+        return f"{header}<pre>{body}</pre>"
 
     except Exception as e:
         logger.exception("Tomorrow ALTIN perf section error: %s", e)
@@ -598,11 +656,27 @@ def build_tomorrow_altin_perf_section(all_rows: list) -> str:
 
 
 def format_volume(v: Any) -> str:
-    try:
+    # float/int (TV/history satırları) ve None (eksik veri) try/except yoluna hiç girmez;
+    # None'ı safe_float'a vermek her seferinde TypeError fırlatıp yakalamak demekti
+    t = type(v)
+    if t is float:
+        n = v
+    elif t is int:
         n = float(v)
-    except Exception:
+    elif v is None:
+        return "n/a"
+    else:
+        n = safe_float(v)
+    if n != n:
         return "n/a"
-    absn = abs(n)
+    return _format_volume_num(n)
+
+
+@lru_cache(maxsize=2048)
+def _format_volume_num(n: float) -> str:
+    # Radar snapshot / TV cache aynı hacim değerlerini tekrar tekrar tablolatıyor:
+    # etiket bir kez üretilip sayfalar/tablolar arasında paylaşılır
+    absn = -n if n < 0 else n
     if absn >= 1_000_000_000:
         s = f"{n/1_000_000_000:.1f}B"
         return s.replace(".0B", "B")
@@ -613,14 +687,20 @@ def format_volume(v: Any) -> str:
     return f"{n:.0f}"
 
 
+@lru_cache(maxsize=64)
+def _parse_csv(raw: str) -> Tuple[str, ...]:
+    # Ham env değeri anahtar: env değişirse yeni parse, değişmezse her komutta split/strip yok
+    raw = raw.strip()
+    if not raw:
+        return ()
+    return tuple(p.strip().upper() for p in raw.split(",") if p.strip())
+
+
 def env_csv(name: str, default: str = "") -> List[str]:
     raw = os.getenv(name, default)
     if raw is None:
         return []
-    raw = raw.strip()
-    if not raw:
-        return []
-    return [p.strip().upper() for p in raw.split(",") if p.strip()]
+    return list(_parse_csv(raw))
 
 def env_csv_fallback(primary: str, fallback: str, default: str = "") -> List[str]:
     lst = env_csv(primary, default)
@@ -639,11 +719,14 @@ def parse_hhmm(s: str, default_h: int, default_m: int) -> tuple[int, int]:
         return default_h, default_m
 
 
+# Env process boyunca sabit: pencere import'ta bir kez parse edilir
+ALTIN_FOLLOW_START_HM = parse_hhmm(os.getenv("ALTIN_FOLLOW_START", "10:30"), 10, 30)
+ALTIN_FOLLOW_END_HM = parse_hhmm(os.getenv("ALTIN_FOLLOW_END", "19:30"), 19, 30)
+
+
 def within_altin_follow_window(now: datetime) -> bool:
-    start_s = os.getenv("ALTIN_FOLLOW_START", "10:30")
-    end_s = os.getenv("ALTIN_FOLLOW_END", "19:30")
-    sh, sm = parse_hhmm(start_s, 10, 30)
-    eh, em = parse_hhmm(end_s, 19, 30)
+    sh, sm = ALTIN_FOLLOW_START_HM
+    eh, em = ALTIN_FOLLOW_END_HM
 
     start_t = now.replace(hour=sh, minute=sm, second=0, microsecond=0)
     end_t = now.replace(hour=eh, minute=em, second=0, microsecond=0)
@@ -655,18 +738,38 @@ def fmt_price(x: float) -> str:
     return f"{x:.2f}" if x == x else "n/a"
 
 
-def normalize_is_ticker(t: str) -> str:
+# Komut argümanı temizliği: handler'larda her çağrıda re.sub(pattern string) yerine
+_TICKER_JUNK_RE = re.compile(r"[^A-Za-z0-9:_\.]")
+
+
+def parse_int_arg(a: str, default: Optional[int] = None) -> Optional[int]:
+    # Hızlı yol: "3" gibi temiz giriş doğrudan int; "#3", "s2" gibi çöp nadir
+    if a.isdecimal():  # isdigit "²" gibi int()'in kabul etmediği karakterleri de geçirir
+        return int(a)
+    # 1-4 karakterlik girişte regex motoruna girmek yerine düz filtre (\d ile aynı küme)
+    digits = "".join(ch for ch in a if ch.isdecimal())
+    return int(digits) if digits else default
+
+
+@lru_cache(maxsize=1024)
+def short_is_ticker(t: str) -> str:
+    # "BIST:" öneki / ".IS" soneki: önek-sonek bilindiği için regex yerine slice
     t = t.strip().upper()
-    if not t:
-        return t
     if t.startswith("BIST:"):
-        base = t.replace("BIST:", "")
-    else:
-        base = t
-    if base.endswith(".IS"):
-        base = base[:-3]
+        t = t[5:]
+    if t.endswith(".IS"):
+        t = t[:-3]
+    return t
+
+
+@lru_cache(maxsize=1024)
+def normalize_is_ticker(t: str) -> str:
+    base = short_is_ticker(t)
+    if not base:
+        return base
     return f"BIST:{base}"
-    
+
+
 def get_altin_tickers_from_tomorrow_chain() -> tuple[list[str], dict]:
     """
     Dünkü /tomorrow zincirinden ALTIN tickers + ref_close_map döner.
@@ -700,7 +803,7 @@ def get_altin_tickers_from_tomorrow_chain() -> tuple[list[str], dict]:
             try:
                 active_key = max(TOMORROW_CHAINS.keys(), key=_ts_for_key)
             except Exception:
-                active_key = sorted(TOMORROW_CHAINS.keys())[-1]
+                active_key = max(TOMORROW_CHAINS)
 
         chain_obj = TOMORROW_CHAINS.get(active_key)
 
@@ -760,7 +863,7 @@ def get_altin_tickers_from_tomorrow_chain() -> tuple[list[str], dict]:
 
     # Eğer kind üzerinden ALTIN bulunamadıysa: ref_close_map'ten ilk 6'yı al
     if not altin_tickers:
-        altin_tickers = list(ref_close_map.keys())[:6]
+        altin_tickers = list(islice(ref_close_map, 6))
 
     return altin_tickers[:6], ref_close_map
 
@@ -783,7 +886,7 @@ def get_aday_tickers_from_tomorrow_chain() -> tuple[list[str], dict]:
 
         if active_key not in TOMORROW_CHAINS:
             try:
-                active_key = sorted(TOMORROW_CHAINS.keys())[-1]
+                active_key = max(TOMORROW_CHAINS)
             except Exception:
                 active_key = None
 
@@ -832,10 +935,10 @@ def get_aday_tickers_from_tomorrow_chain() -> tuple[list[str], dict]:
 def _pct_price(ref_close: float, pct: float) -> float:
     try:
         if ref_close != ref_close:
-            return float("nan")
+            return _NAN
         return float(ref_close) * (1.0 + pct / 100.0)
     except Exception:
-        return float("nan")
+        return _NAN
 
 def make_chain_id(base_key: str) -> str:
     dt = now_tr()
@@ -880,7 +983,7 @@ def format_tomorrow_section(
         p1_s = "n/a" if p1 != p1 else f"{p1:.2f}"
         p2_s = "n/a" if p2 != p2 else f"{p2:.2f}"
 
-        ch = safe_float(r.get("change", float("nan")))
+        ch = safe_float(r.get("change", _NAN))
         ch_s = "" if ch != ch else f" • %{ch:+.2f}"
 
         lines.append(
@@ -895,8 +998,62 @@ def format_tomorrow_section(
 
     return "\n".join(lines)
 
-def chunk_list(lst: List[Any], size: int) -> List[List[Any]]:
-    return [lst[i:i + size] for i in range(0, len(lst), size)]
+def iter_chunks(seq: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    # Parçaları tek tek üret: tüm bölümleri baştan materyalize etme
+    size = max(1, int(size))
+    if isinstance(seq, (list, tuple)):
+        for i in range(0, len(seq), size):
+            yield seq[i:i + size]
+        return
+    # generator / map gibi uzunluğu bilinmeyen kaynaklar: listeye çevirmeden islice
+    it = iter(seq)
+    while True:
+        part = list(islice(it, size))
+        if not part:
+            return
+        yield part
+
+# ===============================
+# BIST200 evreni (env process boyunca sabit → import'ta bir kez parse)
+# ===============================
+RADAR_PAGE_SIZE = 25
+BIST200: Tuple[str, ...] = tuple(env_csv("BIST200_TICKERS"))
+RADAR_TOTAL_PAGES = (len(BIST200) + RADAR_PAGE_SIZE - 1) // RADAR_PAGE_SIZE
+# Normalize edilmiş halleri de bir kez: TV sembolü ("BIST:XXX") ve kısa kod ("XXX")
+BIST200_TV: Tuple[str, ...] = tuple(normalize_is_ticker(x) for x in BIST200 if x.strip())
+BIST200_SHORTS: Tuple[str, ...] = tuple(short_is_ticker(x) for x in BIST200 if x.strip())
+# XU100 eklenmiş tam tarama listesi de sabit (/eod, /radar, job'lar her seferinde kopyalayıp append etmesin)
+BIST200_TV_XU: Tuple[str, ...] = BIST200_TV + ("BIST:XU100",)
+
+
+def shorts_for(is_list: List[str]) -> Tuple[str, ...]:
+    if is_list is BIST200:
+        return BIST200_SHORTS
+    return tuple(map(short_is_ticker, is_list))
+
+
+def tv_symbols_for(
+    is_list: List[str],
+    shorts: Optional[Tuple[str, ...]] = None,
+    with_xu: bool = False,
+) -> Sequence[str]:
+    """TV sembolleri (salt okunur). with_xu=True → sona BIST:XU100 eklenir (tek POST'ta özet)."""
+    # Evrenin kendisi geldiyse hazır normalize listeyi kullan
+    if is_list is BIST200:
+        return BIST200_TV_XU if with_xu else BIST200_TV
+    # Kısa adlar zaten çıkarıldıysa tekrar normalize etme: "BIST:" + short yeter
+    if shorts is None:
+        shorts = shorts_for(is_list)
+    out = ["BIST:" + s for s in shorts if s]
+    if with_xu:
+        out.append("BIST:XU100")
+    return out
+
+
+def radar_page(page: int) -> Tuple[str, ...]:
+    # Sayfa listesi: tüm parçaları üretmeden doğrudan slice
+    start = (page - 1) * RADAR_PAGE_SIZE
+    return BIST200[start:start + RADAR_PAGE_SIZE]
 
 def now_tr() -> datetime:
     return datetime.now(tz=TZ)
@@ -960,29 +1117,26 @@ def detect_r0_early_breakout(
     if regime_tag not in R0_ALLOW_REGIMES:
         return
 
+    # Endeks sert düşüşteyse hiçbir satır R0 alamaz: satır satır bakmadan çık
+    if xu_change <= -1.2:
+        return
+
+    lo, hi = R0_MIN_CHG, R0_MAX_CHG
     for r in rows:
         try:
+            # En seçici koşul önce: satırların çoğu değişim bandında elenir,
+            # gap/hacim alanları sadece bandı geçenler için parse edilir
             chg = safe_float(r.get("change"))
-            gap = safe_float(r.get("gap_pct", 0.0))
-            vol_ratio = safe_float(r.get("vol_ratio", 1.0))
-            vol_std = safe_float(r.get("vol_std", 0.0))
-
-            if chg != chg:
-                continue
-
-            if not (R0_MIN_CHG <= chg <= R0_MAX_CHG):
+            if chg != chg or not (lo <= chg <= hi):
                 continue
 
-            if abs(gap) > R0_MAX_GAP:
+            if abs(safe_float(r.get("gap_pct", 0.0))) > R0_MAX_GAP:
                 continue
 
-            if vol_ratio < R0_MIN_VOL_RATIO:
+            if safe_float(r.get("vol_ratio", 1.0)) < R0_MIN_VOL_RATIO:
                 continue
 
-            if vol_std > R0_VOL_STD_MAX:
-                continue
-
-            if xu_change <= -1.2:
+            if safe_float(r.get("vol_std", 0.0)) > R0_VOL_STD_MAX:
                 continue
 
             r["signal"] = "🚀"
@@ -1046,8 +1200,8 @@ def _load_json(path: str) -> Dict[str, Any]:
     try:
         if not os.path.exists(path):
             return {}
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f) or {}
+        with open(path, "rb") as f:
+            return _json_loads(f.read()) or {}
     except Exception as e:
         logger.warning("History load failed (%s): %s", path, e)
         return {}
@@ -1061,6 +1215,40 @@ def _atomic_write_json(path: str, data: Dict[str, Any]) -> None:
     except Exception as e:
         logger.warning("History write failed (%s): %s", path, e)
 
+# Salt-okunur history cache: /tomorrow, balina, band taramaları ticker başına iki JSON'u
+# baştan parse ediyordu; dosya (mtime/size/inode) değişmedikçe tek parse paylaşılır
+_HIST_RO_CACHE: Optional[Tuple[Tuple[Any, Any], Tuple[Dict[str, Any], Dict[str, Any], List[str]]]] = None
+_HIST_RO_LOCK = threading.Lock()
+
+
+def _file_sig(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+    except OSError:
+        return None
+
+
+def load_history_readonly() -> Tuple[Dict[str, Any], Dict[str, Any], List[str]]:
+    """(price_hist, vol_hist, sıralı gün listesi). Dönen dict'ler paylaşımlı: sadece okuma!
+    Yazan yollar (update_history_from_rows, bootstrap) kendi _load_json kopyasını kullanır."""
+    global _HIST_RO_CACHE
+    sig = (_file_sig(PRICE_HISTORY_FILE), _file_sig(VOLUME_HISTORY_FILE))
+    with _HIST_RO_LOCK:
+        hit = _HIST_RO_CACHE
+        if hit is not None and hit[0] == sig:
+            return hit[1]
+        price_hist = _load_json(PRICE_HISTORY_FILE)
+        vol_hist = _load_json(VOLUME_HISTORY_FILE)
+        if not isinstance(price_hist, dict):
+            price_hist = {}
+        if not isinstance(vol_hist, dict):
+            vol_hist = {}
+        days = sorted(set(price_hist) | set(vol_hist))
+        val = (price_hist, vol_hist, days)
+        _HIST_RO_CACHE = (sig, val)
+        return val
+
 def load_acc_entry_state():
     try:
         data = _load_json(ACC_ENTRY_STATE_FILE)
@@ -1122,7 +1310,7 @@ async def job_acc_entry_follow(context: ContextTypes.DEFAULT_TYPE) -> None:
         if not state:
             return
 
-        universe = env_csv("BIST200_TICKERS")
+        universe = BIST200
         if not universe:
             universe = env_csv("UNIVERSE_TICKERS")
 
@@ -1130,8 +1318,8 @@ async def job_acc_entry_follow(context: ContextTypes.DEFAULT_TYPE) -> None:
             logger.warning("ACC_ENTRY follow skipped: universe empty")
             return
 
-        xu_close, xu_change, xu_vol, xu_open = await get_xu100_summary()
-        rows = await build_rows_from_is_list(universe, xu_change)
+        (xu_close, xu_change, xu_vol, xu_open), tv_map = await fetch_xu100_and_rows_map(universe)
+        rows = await build_rows_from_is_list(universe, xu_change, tv_map=tv_map)
 
         row_map = {
             (r.get("ticker") or "").strip().upper(): r
@@ -1307,9 +1495,26 @@ def within_tomorrow_follow_window(dt: datetime) -> bool:
     cur = (h, m)
     return start <= cur <= end
     
+def _hist_price(x: Any) -> float:
+    # Yahoo float32 artığı (45.279998779296875) yerine kompakt değer: JSON küçülür, load hızlanır
+    return round(float(x), 4)
+
+
+def _hist_volume(x: Any) -> float:
+    return float(round(float(x)))
+
+
+_HISTORY_LOCK = threading.Lock()  # history JSON read-modify-write (satır güncellemesi + Yahoo bootstrap, thread'lerden de)
+
+
 def update_history_from_rows(rows: List[Dict[str, Any]]) -> None:
     if not rows:
         return
+    with _HISTORY_LOCK:
+        _update_history_from_rows_locked(rows)
+
+
+def _update_history_from_rows_locked(rows: List[Dict[str, Any]]) -> None:
     day = today_key_tradingday()
     price_hist = _load_json(PRICE_HISTORY_FILE)
     vol_hist = _load_json(VOLUME_HISTORY_FILE)
@@ -1321,14 +1526,14 @@ def update_history_from_rows(rows: List[Dict[str, Any]]) -> None:
     vol_hist.setdefault(day, {})
     for r in rows:
         t = (r.get("ticker") or "").strip().upper()
-        cl = r.get("close", float("nan"))
-        vol = r.get("volume", float("nan"))
+        cl = r.get("close", _NAN)
+        vol = r.get("volume", _NAN)
         if not t:
             continue
         if cl != cl or vol != vol:
             continue
-        price_hist[day][t] = float(cl)
-        vol_hist[day][t] = float(vol)
+        price_hist[day][t] = _hist_price(cl)
+        vol_hist[day][t] = _hist_volume(vol)
     _prune_days(price_hist, HISTORY_DAYS)
     _prune_days(vol_hist, HISTORY_DAYS)
     _atomic_write_json(PRICE_HISTORY_FILE, price_hist)
@@ -1340,15 +1545,17 @@ async def tv_snapshot_save_daily(context: ContextTypes.DEFAULT_TYPE = None) -> N
             logger.info("TV SNAPSHOT | disabled")
             return
 
-        bist200_list = env_csv("BIST200_TICKERS")
+        bist200_list = BIST200
         if not bist200_list:
             logger.warning("TV SNAPSHOT | BIST200_TICKERS empty")
             return
 
-        tickers = [normalize_is_ticker(x).split(":")[-1] for x in bist200_list if x.strip()]
+        tickers = list(BIST200_SHORTS)
         logger.info("TV SNAPSHOT | start ticker_count=%s", len(tickers))
 
-        xu_close, xu_change, xu_vol, xu_open = await get_xu100_summary()
+        # XU100 + BIST200 tek POST (ayrı XU100 isteği yok); RAM snapshot'ı da tazelenir
+        (xu_close, xu_change, xu_vol, xu_open), tv_map = await fetch_xu100_and_tv_map(BIST200)
+        store_radar_snapshot((xu_close, xu_change, xu_vol, xu_open), tv_map)
         update_index_history(
             today_key_tradingday(),
             xu_close,
@@ -1357,7 +1564,7 @@ async def tv_snapshot_save_daily(context: ContextTypes.DEFAULT_TYPE = None) -> N
             xu_open,
         )
 
-        rows = await build_rows_from_is_list(tickers, xu_change)
+        rows = await build_rows_from_is_list(tickers, xu_change, tv_map=tv_map)
 
         valid_rows = [
             r for r in rows
@@ -1370,7 +1577,7 @@ async def tv_snapshot_save_daily(context: ContextTypes.DEFAULT_TYPE = None) -> N
             len(valid_rows),
         )
 
-        update_history_from_rows(valid_rows)
+        await asyncio.to_thread(update_history_from_rows, valid_rows)
 
         logger.info(
             "TV SNAPSHOT | saved day=%s valid_rows=%s",
@@ -1404,13 +1611,13 @@ def update_index_history(day_key: str, close: float, change: float, volume: floa
 
 def _sma(vals: List[float], n: int) -> float:
     if n <= 0 or len(vals) < n:
-        return float("nan")
+        return _NAN
     s = sum(vals[-n:])
     return s / float(n)
 
 def _std(vals: List[float]) -> float:
     if len(vals) < 5:
-        return float("nan")
+        return _NAN
     m = sum(vals) / len(vals)
     v = sum((x - m) ** 2 for x in vals) / (len(vals) - 1)
     return math.sqrt(v)
@@ -1425,8 +1632,8 @@ def compute_regime(xu_close: float, xu_change: float, xu_vol: float, xu_open: fl
         "name": "UNKNOWN",
         "block": False,
         "reason": "",
-        "volatility": float("nan"),
-        "gap_pct": float("nan"),
+        "volatility": _NAN,
+        "gap_pct": _NAN,
         "trend": "n/a",
         "vol_ok": True,
         "gap_ok": True,
@@ -1445,8 +1652,8 @@ def compute_regime(xu_close: float, xu_change: float, xu_vol: float, xu_open: fl
 
     closes: List[float] = []
     changes: List[float] = []
-    prev_close = float("nan")
-    prev_change = float("nan")
+    prev_close = _NAN
+    prev_change = _NAN
 
     for k in keys[-max(10, REJIM_LOOKBACK + 3):]:
         item = idx_hist.get(k, {}) if isinstance(idx_hist, dict) else {}
@@ -1466,7 +1673,7 @@ def compute_regime(xu_close: float, xu_change: float, xu_vol: float, xu_open: fl
         reg["gap_pct"] = (xu_open / prev_close - 1.0) * 100.0
 
     look_changes = changes[-REJIM_LOOKBACK:] if len(changes) >= 5 else []
-    reg["volatility"] = _std(look_changes) if look_changes else float("nan")
+    reg["volatility"] = _std(look_changes) if look_changes else _NAN
 
     fast = _sma(closes, REJIM_TREND_SMA_FAST)
     slow = _sma(closes, REJIM_TREND_SMA_SLOW)
@@ -1527,8 +1734,8 @@ def format_regime_line(reg: Dict[str, Any]) -> str:
         return "🧭 <b>Rejim</b>: <b>OFF</b>"
     nm = reg.get("name", "n/a")
     tr = reg.get("trend", "n/a")
-    vol = reg.get("volatility", float("nan"))
-    gap = reg.get("gap_pct", float("nan"))
+    vol = reg.get("volatility", _NAN)
+    gap = reg.get("gap_pct", _NAN)
     vol_s = "n/a" if vol != vol else f"{vol:.2f}"
     gap_s = "n/a" if gap != gap else f"{gap:+.2f}%"
     blk = "⛔️ BLOK" if reg.get("block") else "✅ OK"
@@ -1547,143 +1754,104 @@ def apply_regime_gate_to_rows(rows: List[Dict[str, Any]], reg: Dict[str, Any]) -
 # =========================================================
 # Stats (ticker) over HISTORY_DAYS
 # =========================================================
-def compute_30d_stats(ticker: str) -> Optional[Dict[str, Any]]:
-    t = (ticker or "").strip().upper()
-    if not t:
-        return None
-    price_hist = _load_json(PRICE_HISTORY_FILE)
-    vol_hist = _load_json(VOLUME_HISTORY_FILE)
-    if not isinstance(price_hist, dict) or not isinstance(vol_hist, dict):
-        return None
-    days = sorted(set(list(price_hist.keys()) + list(vol_hist.keys())))
-    if not days:
-        return None
-    days = days[-HISTORY_DAYS:]
-    closes: List[float] = []
-    vols: List[float] = []
+def _window_stats(
+    price_hist: Dict[str, Any],
+    vol_hist: Dict[str, Any],
+    days: List[str],
+    t: str,
+    min_samples: int,
+) -> Optional[Dict[str, Any]]:
+    # Tek geçişli kernel: ara liste + min/max/sum ayrı turları yok (aynı sonuçlar)
     today = today_key_tradingday()
+    inf = float("inf")
+    n_c = n_v = 0
+    sum_c = sum_v = 0.0
+    mn, mx = inf, -inf
+    last_c = last_v = None
     today_close = None
     today_vol = None
+
     for d in days:
-        pd = price_hist.get(d, {})
-        vd = vol_hist.get(d, {})
-        if isinstance(pd, dict) and t in pd:
-            c = safe_float(pd.get(t))
+        pd = price_hist.get(d)
+        c = pd.get(t) if isinstance(pd, dict) else None
+        if c is not None:
+            c = safe_float(c)
             if c == c:
-                closes.append(c)
+                n_c += 1
+                sum_c += c
+                if c < mn:
+                    mn = c
+                if c > mx:
+                    mx = c
+                last_c = c
                 if d == today:
                     today_close = c
-        if isinstance(vd, dict) and t in vd:
-            v = safe_float(vd.get(t))
+
+        vd = vol_hist.get(d)
+        v = vd.get(t) if isinstance(vd, dict) else None
+        if v is not None:
+            v = safe_float(v)
             if v == v:
-                vols.append(v)
+                n_v += 1
+                sum_v += v
+                last_v = v
                 if d == today:
                     today_vol = v
-    if len(closes) < 5 or len(vols) < 5:
+
+    if n_c < min_samples or n_v < min_samples or n_c == 0 or n_v == 0:
         return None
-    mn = float(min(closes))
-    mx = float(max(closes))
-    avg_close = float(sum(closes) / len(closes))
-    avg_vol = float(sum(vols) / len(vols))
+
+    avg_close = sum_c / n_c
+    avg_vol = sum_v / n_v
     if today_close is None:
-        today_close = closes[-1]
+        today_close = last_c
     if today_vol is None:
-        today_vol = vols[-1]
-    ratio = (today_vol / avg_vol) if avg_vol > 0 else float("nan")
+        today_vol = last_v
+
+    ratio = (today_vol / avg_vol) if avg_vol > 0 else _NAN
     if mx > mn:
-        band_pct = (today_close - mn) / (mx - mn) * 100.0
+        band_pct = ((today_close - mn) / (mx - mn)) * 100.0
         band_pct = max(0.0, min(100.0, band_pct))
     else:
         band_pct = 50.0
+
     return {
-        "min": mn,
-        "max": mx,
-        "avg_close": avg_close,
-        "avg_vol": avg_vol,
+        "min": float(mn),
+        "max": float(mx),
+        "avg_close": float(avg_close),
+        "avg_vol": float(avg_vol),
         "today_close": float(today_close),
         "today_vol": float(today_vol),
         "ratio": float(ratio),
         "band_pct": float(band_pct),
         "days_used": len(days),
-        "samples_close": len(closes),
-        "samples_vol": len(vols),
+        "samples_close": n_c,
+        "samples_vol": n_v,
     }
 
-def compute_stats_for_days(ticker: str, days_window: int) -> Optional[Dict[str, Any]]:
+
+def compute_30d_stats(ticker: str) -> Optional[Dict[str, Any]]:
     t = (ticker or "").strip().upper()
     if not t:
         return None
+    price_hist, vol_hist, days = load_history_readonly()
+    if not days:
+        return None
+    days = days[-HISTORY_DAYS:]
+    return _window_stats(price_hist, vol_hist, days, t, 5)
 
-    price_hist = _load_json(PRICE_HISTORY_FILE)
-    vol_hist = _load_json(VOLUME_HISTORY_FILE)
 
-    if not isinstance(price_hist, dict) or not isinstance(vol_hist, dict):
+def compute_stats_for_days(ticker: str, days_window: int) -> Optional[Dict[str, Any]]:
+    t = (ticker or "").strip().upper()
+    if not t:
         return None
 
-    all_days = sorted(set(list(price_hist.keys()) + list(vol_hist.keys())))
+    price_hist, vol_hist, all_days = load_history_readonly()
     if not all_days:
         return None
 
     days = all_days[-max(1, int(days_window)):]
-    closes: List[float] = []
-    vols: List[float] = []
-
-    today = today_key_tradingday()
-    today_close = None
-    today_vol = None
-
-    for d in days:
-        pd = price_hist.get(d, {})
-        vd = vol_hist.get(d, {})
-
-        if isinstance(pd, dict) and t in pd:
-            c = safe_float(pd.get(t))
-            if c == c:
-                closes.append(c)
-                if d == today:
-                    today_close = c
-
-        if isinstance(vd, dict) and t in vd:
-            v = safe_float(vd.get(t))
-            if v == v:
-                vols.append(v)
-                if d == today:
-                    today_vol = v
-
-    if len(closes) < min(3, days_window) or len(vols) < min(3, days_window):
-        return None
-
-    mn = float(min(closes))
-    mx = float(max(closes))
-    avg_close = float(sum(closes) / len(closes))
-    avg_vol = float(sum(vols) / len(vols))
-
-    if today_close is None:
-        today_close = closes[-1]
-    if today_vol is None:
-        today_vol = vols[-1]
-
-    ratio = (today_vol / avg_vol) if avg_vol > 0 else float("nan")
-
-    if mx > mn:
-        band_pct = ((today_close - mn) / (mx - mn)) * 100.0
-        band_pct = max(0.0, min(100.0, band_pct))
-    else:
-        band_pct = 50.0
-
-    return {
-        "min": mn,
-        "max": mx,
-        "avg_close": avg_close,
-        "avg_vol": avg_vol,
-        "today_close": float(today_close),
-        "today_vol": float(today_vol),
-        "ratio": float(ratio),
-        "band_pct": float(band_pct),
-        "days_used": len(days),
-        "samples_close": len(closes),
-        "samples_vol": len(vols),
-    }
+    return _window_stats(price_hist, vol_hist, days, t, min(3, days_window))
 
 def get_ticker_series_days(ticker: str, days_window: int) -> Optional[List[Dict[str, Any]]]:
     t = (ticker or "").strip().upper()
@@ -1693,13 +1861,7 @@ def get_ticker_series_days(ticker: str, days_window: int) -> Optional[List[Dict[
     if t.endswith(".IS"):
         t = t[:-3]
 
-    price_hist = _load_json(PRICE_HISTORY_FILE)
-    vol_hist = _load_json(VOLUME_HISTORY_FILE)
-
-    if not isinstance(price_hist, dict) or not isinstance(vol_hist, dict):
-        return None
-
-    all_days = sorted(set(list(price_hist.keys()) + list(vol_hist.keys())))
+    price_hist, vol_hist, all_days = load_history_readonly()
     if not all_days:
         return None
 
@@ -1868,11 +2030,11 @@ def score_balina(m: Dict[str, Any]) -> float:
     return round(score, 2)
 
 def build_balina_list() -> List[Dict[str, Any]]:
-    bist200_list = env_csv("BIST200_TICKERS")
+    bist200_list = BIST200
     if not bist200_list:
         return []
 
-    tickers = [normalize_is_ticker(x).split(":")[-1] for x in bist200_list if x.strip()]
+    tickers = list(BIST200_SHORTS)
     out: List[Dict[str, Any]] = []
 
     for raw in tickers:
@@ -1899,7 +2061,10 @@ def build_balina_list() -> List[Dict[str, Any]]:
         m["score"] = score_balina(m)
         out.append(m)
 
-    out.sort(
+    # Sadece ilk BALINA_TOP_N lazım: tam sort yerine kısmi seçim
+    return heapq.nlargest(
+        BALINA_TOP_N,
+        out,
         key=lambda x: (
             x["score"],
             x["squeeze_days"],
@@ -1907,17 +2072,14 @@ def build_balina_list() -> List[Dict[str, Any]]:
             x["vol_ratio"],
             -x["band_pct"],
         ),
-        reverse=True,
     )
 
-    return out[:BALINA_TOP_N]
-
 def build_balina_breakout_list() -> List[Dict[str, Any]]:
-    bist200_list = env_csv("BIST200_TICKERS")
+    bist200_list = BIST200
     if not bist200_list:
         return []
 
-    tickers = [normalize_is_ticker(x).split(":")[-1] for x in bist200_list if x.strip()]
+    tickers = list(BIST200_SHORTS)
     out: List[Dict[str, Any]] = []
 
     for raw in tickers:
@@ -1948,7 +2110,9 @@ def build_balina_breakout_list() -> List[Dict[str, Any]]:
         m["score"] = score_balina(m)
         out.append(m)
 
-    out.sort(
+    return heapq.nlargest(
+        BALINA_TOP_N,
+        out,
         key=lambda x: (
             x["score"],
             x["burst_ratio"],
@@ -1956,17 +2120,14 @@ def build_balina_breakout_list() -> List[Dict[str, Any]]:
             x["squeeze_days"],
             -x["band_pct"],
         ),
-        reverse=True,
     )
 
-    return out[:BALINA_TOP_N]
-
 def build_balina_swing_list() -> List[Dict[str, Any]]:
-    bist200_list = env_csv("BIST200_TICKERS")
+    bist200_list = BIST200
     if not bist200_list:
         return []
 
-    tickers = [normalize_is_ticker(x).split(":")[-1] for x in bist200_list if x.strip()]
+    tickers = list(BIST200_SHORTS)
     out: List[Dict[str, Any]] = []
 
     for raw in tickers:
@@ -2003,24 +2164,23 @@ def build_balina_swing_list() -> List[Dict[str, Any]]:
         m["score"] = score_balina(m)
         out.append(m)
 
-    out.sort(
+    return heapq.nlargest(
+        BALINA_TOP_N,
+        out,
         key=lambda x: (
             x["score"],
             x["squeeze_days"],
             x["vol_ratio"],
             -x["band_pct"],
         ),
-        reverse=True,
     )
 
-    return out[:BALINA_TOP_N]
-
 def build_band_scan_rows(days_window: int, limit: int = 30) -> List[Dict[str, Any]]:
-    bist200_list = env_csv("BIST200_TICKERS")
+    bist200_list = BIST200
     if not bist200_list:
         return []
 
-    rows: List[Dict[str, Any]] = []
+    scored: List[Tuple[Tuple[float, float], Dict[str, Any]]] = []
 
     for ticker in bist200_list:
         t = (ticker or "").strip().upper()
@@ -2031,60 +2191,58 @@ def build_band_scan_rows(days_window: int, limit: int = 30) -> List[Dict[str, An
         if not st:
             continue
 
-        band = st.get("band_pct", float("nan"))
-        close = st.get("today_close", float("nan"))
-        ratio = st.get("ratio", float("nan"))
-        avg_vol = st.get("avg_vol", float("nan"))
-        today_vol = st.get("today_vol", float("nan"))
+        band = st.get("band_pct", _NAN)
+        close = st.get("today_close", _NAN)
+        ratio = st.get("ratio", _NAN)
+        avg_vol = st.get("avg_vol", _NAN)
+        today_vol = st.get("today_vol", _NAN)
 
         if band != band or close != close:
             continue
 
-        rows.append({
-            "ticker": t,
-            "band_pct": band,
-            "close": close,
-            "ratio": ratio,
-            "avg_vol": avg_vol,
-            "today_vol": today_vol,
-            "days_window": days_window,
-        })
+        # Sıralama anahtarı burada bir kez (NaN ratio → 0); comparator'da tekrar .get yok
+        scored.append((
+            (band, -(ratio if ratio == ratio else 0.0)),
+            {
+                "ticker": t,
+                "band_pct": band,
+                "close": close,
+                "ratio": ratio,
+                "avg_vol": avg_vol,
+                "today_vol": today_vol,
+                "days_window": days_window,
+            },
+        ))
+
+    return [r for _, r in heapq.nsmallest(max(1, int(limit)), scored, key=itemgetter(0))]
 
-    rows.sort(
-        key=lambda x: (
-            x.get("band_pct", 999.0),
-            -(x.get("ratio", 0.0) if x.get("ratio", 0.0) == x.get("ratio", 0.0) else 0.0),
-        )
-    )
 
-    return rows[:max(1, int(limit))]
+# Satır şablonu bir kez derlenir; her satırda f-string kodu yeniden üretilmez
+_BAND_ROW_FMT = "{:<5} {:>6} {:>8} {:>6}".format
 
 
 def make_band_scan_table(rows: List[Dict[str, Any]], title: str) -> str:
-    header = f"{'HIS':<5} {'BAND':>6} {'FYT':>8} {'HCM':>6}"
+    header = _BAND_ROW_FMT("HIS", "BAND", "FYT", "HCM")
     sep = "-" * len(header)
-    lines = [title, "<pre>", header, sep]
-
-    for r in rows:
-        t = (r.get("ticker", "n/a") or "n/a")[:5]
-        band = r.get("band_pct", float("nan"))
-        close = r.get("close", float("nan"))
-        ratio = r.get("ratio", float("nan"))
-
-        band_s = "n/a" if (band != band) else f"%{band:.0f}"
-        close_s = "n/a" if (close != close) else f"{close:.2f}"
-        ratio_s = "n/a" if (ratio != ratio) else f"{ratio:.2f}x"
 
-        lines.append(f"{t:<5} {band_s:>6} {close_s:>8} {ratio_s:>6}")
+    def _line(r: Dict[str, Any]) -> str:
+        band = r.get("band_pct", _NAN)
+        close = r.get("close", _NAN)
+        ratio = r.get("ratio", _NAN)
+        return _BAND_ROW_FMT(
+            (r.get("ticker", "n/a") or "n/a")[:5],
+            "n/a" if (band != band) else f"%{band:.0f}",
+            "n/a" if (close != close) else f"{close:.2f}",
+            "n/a" if (ratio != ratio) else f"{ratio:.2f}x",
+        )
 
-    lines.append("</pre>")
-    return "\n".join(lines)
+    return "\n".join([title, "<pre>", header, sep, *map(_line, rows), "</pre>"])
 
 def soft_plan_line(stats: Dict[str, Any], current_close: float) -> str:
     if not stats:
         return "Plan: Veri yetersiz (arşiv dolsun)."
     band = stats.get("band_pct", 50.0)
-    ratio = stats.get("ratio", float("nan"))
+    ratio = stats.get("ratio", _NAN)
     if band <= 25:
         band_tag = "ALT BANT (dip bölgesi)"
         base_plan = "Sakin açılışta takip; +%2–%4 kademeli kâr mantıklı."
@@ -2120,84 +2278,499 @@ def format_30d_note(ticker: str, current_close: float) -> str:
         f"  ↳ <i>{plan}</i>"
     )
 
+# =========================================================
+# Rate limiting (token bucket)
+# =========================================================
+class AsyncRateLimiter:
+    """Basit token-bucket: `per` saniyede en fazla `rate` izin; `async with` ile kullanılır."""
+
+    def __init__(self, rate: float, per: float = 1.0) -> None:
+        self.rate = max(0.0, float(rate))
+        self.per = float(per) if per > 0 else 1.0
+        self._tokens = self.rate
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:  # 0 → sınır kapalı
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._last) * self.rate / self.per)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) * self.per / self.rate)
+
+    async def __aenter__(self) -> "AsyncRateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> bool:
+        return False
+
+
+_TG_LIMITER = AsyncRateLimiter(TG_RATE_PER_SEC)
+_TV_LIMITER = AsyncRateLimiter(TV_RATE_PER_SEC)
+
+
+class RateLimitedHTTPXRequest(HTTPXRequest):
+    """Tüm Bot API gönderimleri (reply_text/send_message/...) tek limiter'dan geçer."""
+
+    async def do_request(self, *args: Any, **kwargs: Any):
+        async with _TG_LIMITER:
+            return await super().do_request(*args, **kwargs)
+
+
 # =========================================================
 # TradingView Scanner
 # =========================================================
-def tv_scan_symbols_sync(symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+def _make_http_session(pool_maxsize: int = 32) -> requests.Session:
+    """Keep-alive'lı ortak Session: her çağrıda yeni TCP+TLS handshake olmasın."""
+    sess = requests.Session()
+    # Geçici 5xx / bağlantı kopması adapter seviyesinde (üstel bekleme, Retry-After'a uyar);
+    # 401/403/429 blok durumları çağıranın kendi cooldown mantığında kalır
+    retry = Retry(
+        total=2,
+        backoff_factor=0.5,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry)
+    sess.mount("https://", adapter)
+    sess.mount("http://", adapter)
+    sess.headers.update({"Connection": "keep-alive"})
+    return sess
+
+
+
+_TV_BREAKER_LOCK = threading.Lock()
+_TV_FAIL_COUNT = 0
+_TV_CIRCUIT_OPEN_UNTIL = 0.0  # monotonic
+
+
+def _tv_circuit_open() -> bool:
+    return time.monotonic() < _TV_CIRCUIT_OPEN_UNTIL
+
+
+def _tv_record_result(ok: bool) -> None:
+    global _TV_FAIL_COUNT, _TV_CIRCUIT_OPEN_UNTIL
+    with _TV_BREAKER_LOCK:
+        if ok:
+            _TV_FAIL_COUNT = 0
+            return
+        _TV_FAIL_COUNT += 1
+        if TV_BREAKER_FAILS > 0 and _TV_FAIL_COUNT >= TV_BREAKER_FAILS:
+            _TV_CIRCUIT_OPEN_UNTIL = time.monotonic() + TV_BREAKER_COOLDOWN_SEC
+            _TV_FAIL_COUNT = 0
+            logger.warning("TradingView circuit OPEN for %ss", TV_BREAKER_COOLDOWN_SEC)
+
+
+# Async client (PTB zaten httpx kullanıyor): event loop'u bloklamadan, keep-alive havuzlu
+_TV_CLIENT: Optional[httpx.AsyncClient] = None
+_TV_SEM = asyncio.Semaphore(max(1, TV_MAX_CONCURRENCY))
+
+
+def _get_tv_client() -> httpx.AsyncClient:
+    global _TV_CLIENT
+    if _TV_CLIENT is None or _TV_CLIENT.is_closed:
+        _TV_CLIENT = httpx.AsyncClient(
+            timeout=httpx.Timeout(TV_READ_TIMEOUT, connect=TV_CONNECT_TIMEOUT),
+            # Boşta bağlantı 60 sn: aynı taramanın shard/retry'ları ve arka arkaya komutlar
+            # TLS'i paylaşır; dakikalarca aralıklı job'lar yeniden bağlanır
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=10, keepalive_expiry=60),
+            # gzip açıkça istenir: 200 sembollük JSON sıkıştırılmış gelsin (httpx şeffaf açar)
+            headers={"Content-Type": "application/json", "Accept-Encoding": "gzip, deflate"},
+            http2=TV_HTTP2,
+        )
+    return _TV_CLIENT
+
+
+async def close_tv_client() -> None:
+    global _TV_CLIENT
+    if _TV_CLIENT is not None and not _TV_CLIENT.is_closed:
+        try:
+            await _TV_CLIENT.aclose()
+        except Exception as e:
+            logger.warning("TV client close failed: %s", e)
+    _TV_CLIENT = None
+
+
+# Varsayılan kolonlar (XU100 özeti open'a da bakar); satır üretimi için ilk üçü yeter
+TV_DEFAULT_COLUMNS: Tuple[str, ...] = ("close", "change", "volume", "open")
+TV_ROW_COLUMNS: Tuple[str, ...] = ("close", "change", "volume")
+
+
+def _parse_tv_scan(
+    data: Dict[str, Any],
+    columns: Tuple[str, ...] = TV_DEFAULT_COLUMNS,
+) -> Dict[str, Dict[str, Any]]:
+    # Ham cevap (bytes → orjson) tek seferde çözülür; burada sadece kullanılan alanlar
+    # yeni dict'e alınır, ham "data" listesi fonksiyon dönünce serbest kalır
+    out: Dict[str, Dict[str, Any]] = {}
+    sf = safe_float
+    n = len(columns)
+    items = data.get("data") or ()
+    # Sabit kolon setleri için doğrudan index: satır başına zip + dict comprehension yok
+    if columns is TV_ROW_COLUMNS:
+        for it in items:
+            sym = it.get("s") or it.get("symbol")
+            d = it.get("d")
+            if not sym or type(d) is not list or len(d) < 3:
+                continue
+            out[sym.rpartition(":")[2].strip().upper()] = {
+                "close": sf(d[0]),
+                "change": sf(d[1]),
+                "volume": sf(d[2]),
+            }
+        return out
+    if columns is TV_DEFAULT_COLUMNS:
+        for it in items:
+            sym = it.get("s") or it.get("symbol")
+            d = it.get("d")
+            if not sym or type(d) is not list or len(d) < 4:
+                continue
+            out[sym.rpartition(":")[2].strip().upper()] = {
+                "close": sf(d[0]),
+                "change": sf(d[1]),
+                "volume": sf(d[2]),
+                "open": sf(d[3]),
+            }
+        return out
+    for it in items:
+        sym = it.get("s") or it.get("symbol")
+        d = it.get("d")
+        if not sym or type(d) is not list or len(d) < n:
+            continue
+        out[sym.rpartition(":")[2].strip().upper()] = {c: sf(v) for c, v in zip(columns, d)}
+    return out
+
+
+def _tv_backoff(attempt: int) -> float:
+    # Üstel bekleme + jitter: aynı anda düşen istekler aynı saniyede geri dönmesin
+    return min(TV_RETRY_CAP_SEC, 1.0 * (2 ** attempt)) + random.random() * 0.5
+
+
+def _tv_retry_after(r: httpx.Response) -> float:
+    # Sunucu Retry-After (saniye) verdiyse ona uy; tarih formatı / bozuk değer → 0
+    try:
+        v = float((r.headers.get("Retry-After") or "0").strip())
+    except Exception:
+        return 0.0
+    return max(0.0, min(TV_RETRY_CAP_SEC, v))
+
+
+async def tv_scan_symbols_async(
+    symbols: Sequence[str],
+    columns: Tuple[str, ...] = TV_DEFAULT_COLUMNS,
+) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Tek POST (+retry). Başarısızsa None; breaker kaydı çağıran tv_scan_many'de."""
+    if not symbols:
+        return {}
+    payload = {"symbols": {"tickers": list(symbols)}, "columns": list(columns)}
+    body = _json_dumps(payload)  # retry'larda tekrar encode etme
+    client = _get_tv_client()
+    for attempt in range(3):
+        last = attempt == 2  # son denemeden sonra boşuna uyuma
+        try:
+            # Hız limiti her gerçek POST için (shard'lar ve retry'lar dahil)
+            async with _TV_LIMITER, _TV_SEM:
+                r = await client.post(TV_SCAN_URL, content=body)
+            if r.status_code == 429 or r.status_code >= 500:
+                logger.warning("TradingView scan HTTP %s (attempt %d)", r.status_code, attempt + 1)
+                if not last:
+                    await asyncio.sleep(_tv_retry_after(r) or _tv_backoff(attempt))
+                continue
+            if r.status_code >= 400:
+                # 4xx (429 hariç) kalıcı: payload/URL hatası, tekrar denemek işe yaramaz
+                logger.warning("TradingView scan rejected: HTTP %s", r.status_code)
+                break
+            raw = r.content
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "TV scan | symbols=%d wire=%dB body=%dB enc=%s",
+                    len(symbols), r.num_bytes_downloaded, len(raw), r.headers.get("Content-Encoding", "-"),
+                )
+            return _parse_tv_scan(_json_loads(raw), columns)
+        except Exception as e:
+            logger.exception("TradingView scan error: %s", e)
+            if not last:
+                await asyncio.sleep(_tv_backoff(attempt))
+    return None
+
+async def tv_scan_many(
+    symbols: Sequence[str],
+    shard: int = TV_SHARD_SIZE,
+    columns: Tuple[str, ...] = TV_DEFAULT_COLUMNS,
+) -> Dict[str, Dict[str, Any]]:
+    if not symbols:
+        return {}
+    if _tv_circuit_open():
+        return {}
+    # 200'lük tek POST yerine parçalar aynı anda (semaphore ile sınırlı) gider, sonuç birleştirilir
+    n = len(symbols)
+    if shard <= 0 or n <= shard:
+        results = [await tv_scan_symbols_async(symbols, columns)]
+    else:
+        # Dengeli parçalar: 201 sembol → 5x~41 (50'lik 4 parça + 1 sembollük artık POST yerine)
+        size = math.ceil(n / math.ceil(n / shard))
+        results = await asyncio.gather(
+            *[tv_scan_symbols_async(part, columns) for part in iter_chunks(symbols, size)]
+        )
+    # Breaker mantıksal tarama başına bir kez: tüm shard'lar düştüyse başarısız sayılır
+    _tv_record_result(any(part is not None for part in results))
+    merged: Dict[str, Dict[str, Any]] = {}
+    for part in results:
+        if part:
+            merged.update(part)
+    return merged
+
+
+# ===============================
+# TV scan cache (TTL + single-flight)
+# ===============================
+
+# key -> (monotonic ts, out); en eski kullanılan başta (LRU)
+_TV_CACHE: "OrderedDict[Tuple[str, ...], Tuple[float, Dict[str, Dict[str, Any]]]]" = OrderedDict()
+_TV_LOCKS: Dict[Tuple[str, ...], asyncio.Lock] = {}
+
+
+def _tv_cache_get(key: Tuple[str, ...]) -> Optional[Dict[str, Dict[str, Any]]]:
+    hit = _TV_CACHE.get(key)
+    if not hit:
+        return None
+
+    if time.monotonic() - hit[0] >= TV_CACHE_TTL_SEC:
+        _TV_CACHE.pop(key, None)
+        return None
+
+    _TV_CACHE.move_to_end(key)
+    return hit[1]
+
+
+def _tv_cache_set(key: Tuple[str, ...], out: Dict[str, Dict[str, Any]], ts: Optional[float] = None) -> None:
+    # ts: verinin çekildiği monotonic an (disk'ten ısıtırken dosyanın yaşı korunur)
+    now = time.monotonic()
+    for k in [k for k, (kts, _) in _TV_CACHE.items() if now - kts >= TV_CACHE_TTL_SEC]:
+        _TV_CACHE.pop(k, None)
+    _TV_CACHE[key] = (now if ts is None else ts, out)
+    _TV_CACHE.move_to_end(key)
+    # Farklı watch/whale listeleri birikip RAM'i şişirmesin
+    while len(_TV_CACHE) > TV_CACHE_MAX_ENTRIES:
+        old_key, _ = _TV_CACHE.popitem(last=False)
+        lock = _TV_LOCKS.get(old_key)
+        if lock is not None and not lock.locked():
+            _TV_LOCKS.pop(old_key, None)
+
+
+# Disk katmanı: dyno restart / deploy sonrası ilk istekler de TV'ye gitmesin
+TV_DISK_CACHE_DIR = os.path.join(EFFECTIVE_DATA_DIR, "tv_cache")
+
+
+def _tv_disk_path(key: Tuple[str, ...]) -> str:
+    h = hashlib.md5("\n".join(key).encode("utf-8")).hexdigest()
+    return os.path.join(TV_DISK_CACHE_DIR, f"{h}.json")
+
+
+def _tv_disk_get(key: Tuple[str, ...]) -> Optional[Tuple[float, Dict[str, Dict[str, Any]]]]:
+    """(yaş sn, data) ya da None."""
+    if TV_DISK_CACHE_TTL_SEC <= 0:
+        return None
+    blob = _load_json(_tv_disk_path(key))
+    ts = blob.get("ts")
+    data = blob.get("data")
+    if not isinstance(ts, (int, float)) or not isinstance(data, dict) or not data:
+        return None
+    age = max(0.0, time.time() - ts)
+    if age >= TV_DISK_CACHE_TTL_SEC:
+        return None
+    return age, data
+
+
+def _tv_disk_set(key: Tuple[str, ...], out: Dict[str, Dict[str, Any]]) -> None:
+    if TV_DISK_CACHE_TTL_SEC <= 0:
+        return
+    try:
+        os.makedirs(TV_DISK_CACHE_DIR, exist_ok=True)
+        # Süresi çoktan dolmuş dosyaları temizle (dizin şişmesin)
+        cutoff = time.time() - max(3600, TV_DISK_CACHE_TTL_SEC)
+        for ent in os.scandir(TV_DISK_CACHE_DIR):
+            if ent.is_file() and ent.stat().st_mtime < cutoff:
+                os.remove(ent.path)
+    except Exception as e:
+        logger.warning("TV disk cache prune failed: %s", e)
+    _atomic_write_json(_tv_disk_path(key), {"ts": time.time(), "data": out})
+
+
+async def tv_scan_symbols(
+    symbols: Sequence[str],
+    columns: Tuple[str, ...] = TV_DEFAULT_COLUMNS,
+    force: bool = False,
+) -> Dict[str, Dict[str, Any]]:
+    """force=True → RAM/disk cache okunmaz, taze POST atılır (sonuç yine cache'e yazılır)."""
     if not symbols:
         return {}
-    payload = {"symbols": {"tickers": symbols}, "columns": ["close", "change", "volume", "open"]}
-    for attempt in range(3):
-        try:
-            r = requests.post(TV_SCAN_URL, json=payload, timeout=TV_TIMEOUT)
-            if r.status_code == 429:
-                time.sleep(1.5 * (attempt + 1))
-                continue
-            r.raise_for_status()
-            data = r.json()
-            out: Dict[str, Dict[str, Any]] = {}
-            for it in data.get("data", []):
-                sym = it.get("symbol") or it.get("s")
-                d = it.get("d", [])
-                if not sym or not isinstance(d, list) or len(d) < 4:
-                    continue
-                short = sym.split(":")[-1].strip().upper()
-                out[short] = {
-                    "close": safe_float(d[0]),
-                    "change": safe_float(d[1]),
-                    "volume": safe_float(d[2]),
-                    "open": safe_float(d[3]),
-                }
-            return out
-        except Exception as e:
-            logger.exception("TradingView scan error: %s", e)
-            time.sleep(1.0 * (attempt + 1))
-    return {}
+    if TV_CACHE_TTL_SEC <= 0:
+        return await tv_scan_many(symbols, columns=columns)
 
-async def tv_scan_symbols(symbols: List[str]) -> Dict[str, Dict[str, Any]]:
-    return await asyncio.to_thread(tv_scan_symbols_sync, symbols)
-
-async def get_xu100_summary() -> Tuple[float, float, float, float]:
-    m = await tv_scan_symbols(["BIST:XU100"])
+    # sıra farkı cache'i bölmesin; farklı kolon setleri birbirinin yerine dönmesin
+    key = (",".join(columns),) + tuple(sorted(symbols))
+    if not force:
+        cached = _tv_cache_get(key)
+        if cached is not None:
+            return cached
+
+    # Aynı anda gelen /radar N istekleri tek POST'u paylaşsın
+    lock = _TV_LOCKS.setdefault(key, asyncio.Lock())
+    async with lock:
+        if not force:
+            cached = _tv_cache_get(key)
+            if cached is not None:
+                return cached
+
+            disk = await asyncio.to_thread(_tv_disk_get, key)
+            if disk is not None:
+                age, data = disk
+                # RAM'e dosyanın gerçek yaşıyla yaz: toplam tazelik TV_CACHE_TTL_SEC'i aşmasın
+                if age < TV_CACHE_TTL_SEC:
+                    _tv_cache_set(key, data, ts=time.monotonic() - age)
+                return data
+
+        # Sadece gerçek POST'lar limiter'dan geçer (tv_scan_symbols_async içinde); cache hit'leri beklemez
+        out = await tv_scan_many(symbols, columns=columns)
+        # Shard'lardan biri düştüyse eksik sonuç TTL boyunca tekrar tekrar servis edilmesin
+        if out and len(out) >= len(symbols) * TV_CACHE_MIN_COVERAGE:
+            _tv_cache_set(key, out)
+            await asyncio.to_thread(_tv_disk_set, key, out)
+        return out
+
+# (monotonic ts, (close, change, volume, open)); toplu taramalar da buraya yazar
+_XU100_CACHE: Optional[Tuple[float, Tuple[float, float, float, float]]] = None
+
+
+async def get_xu100_summary(
+    tv_map: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Tuple[float, float, float, float]:
+    global _XU100_CACHE
+    if tv_map is None and _XU100_CACHE is not None and XU100_CACHE_TTL_SEC > 0:
+        ts, cached = _XU100_CACHE
+        if time.monotonic() - ts < XU100_CACHE_TTL_SEC:
+            return cached
+
+    # tv_map verilirse (XU100 toplu taramaya eklendiyse) ayrıca POST atma
+    m = tv_map if tv_map is not None else await tv_scan_symbols(["BIST:XU100"])
     d = m.get("XU100", {})
-    return (
-        d.get("close", float("nan")),
-        d.get("change", float("nan")),
-        d.get("volume", float("nan")),
-        d.get("open", float("nan")),
+    out = (
+        d.get("close", _NAN),
+        d.get("change", _NAN),
+        d.get("volume", _NAN),
+        d.get("open", _NAN),
+    )
+    if out[0] == out[0]:  # NaN (tarama hatası) cache'lenmesin
+        _XU100_CACHE = (time.monotonic(), out)
+    return out
+
+async def fetch_xu100_and_tv_map(
+    is_list: List[str],
+) -> Tuple[Tuple[float, float, float, float], Dict[str, Dict[str, Any]]]:
+    """XU100 özeti + liste taraması tek POST'ta (XU100 sembol listesine eklenir)."""
+    scanned = await tv_scan_symbols(tv_symbols_for(is_list, with_xu=True))
+    xu = await get_xu100_summary(scanned)
+    # cache'teki dict'i bozmamak için kopya üstünden XU100'ü ayır
+    tv_map = dict(scanned)
+    tv_map.pop("XU100", None)
+    return xu, tv_map
+
+async def fetch_xu100_and_rows_map(
+    is_list: List[str],
+) -> Tuple[Tuple[float, float, float, float], Dict[str, Dict[str, Any]]]:
+    """Küçük listeler (watch, whale, ACC): XU100 özeti ve liste taraması eşzamanlı.
+    XU100 çoğu zaman cache'ten gelir; gelmezse iki POST sırayla değil aynı anda gider."""
+    xu, tv_map = await asyncio.gather(
+        get_xu100_summary(),
+        tv_scan_symbols(tv_symbols_for(is_list), TV_ROW_COLUMNS),
     )
+    return xu, tv_map
 
-# ✅ DÜZELTİLDİ: xu100_change parametresi eklendi (NameError biter)
-async def build_rows_from_is_list(is_list: List[str], xu100_change: float = float("nan")) -> List[Dict[str, Any]]:
-    tv_symbols = [normalize_is_ticker(t) for t in is_list if t.strip()]
-    tv_map = await tv_scan_symbols(tv_symbols)
+# ===============================
+# Radar snapshot (RAM)
+# ===============================
+
+@dataclass(slots=True)
+class RadarSnapshot:
+    # Sabit şekilli kayıt: dict yerine slot (attribute erişimi, tek atamada değişim)
+    ts: float  # monotonic
+    xu: Tuple[float, float, float, float]  # (close, change, vol, open)
+    tv_map: Dict[str, Dict[str, Any]]
+
+
+RADAR_SNAPSHOT: Optional[RadarSnapshot] = None
+
+
+def get_radar_snapshot() -> Optional[Tuple[Tuple[float, float, float, float], Dict[str, Dict[str, Any]]]]:
+    snap = RADAR_SNAPSHOT
+    if snap is None or time.monotonic() - snap.ts >= RADAR_SNAPSHOT_MAX_AGE_SEC:
+        return None
+    return snap.xu, snap.tv_map
+
+
+def store_radar_snapshot(xu: Tuple[float, float, float, float], tv_map: Dict[str, Dict[str, Any]]) -> None:
+    global RADAR_SNAPSHOT
+    # Tam BIST200 taraması yapan her yol (job, /eod) snapshot'ı tazeler;
+    # yarım kalmış tarama 15 dk boyunca /radar'a eksik sayfa döndürmesin
+    if not tv_map or len(tv_map) < len(BIST200) * TV_CACHE_MIN_COVERAGE:
+        return
+    RADAR_SNAPSHOT = RadarSnapshot(time.monotonic(), xu, tv_map)
+
+
+async def job_radar_snapshot(context: ContextTypes.DEFAULT_TYPE = None) -> None:
+    if not BIST200:
+        return
+    try:
+        xu, tv_map = await fetch_xu100_and_tv_map(BIST200)
+        if not tv_map:
+            logger.warning("RADAR SNAPSHOT | empty tv_map (skip)")
+            return
+        store_radar_snapshot(xu, tv_map)
+        logger.info("RADAR SNAPSHOT | refreshed symbols=%d", len(tv_map))
+    except Exception as e:
+        logger.warning("RADAR SNAPSHOT failed: %s", e)
 
+# ✅ DÜZELTİLDİ: xu100_change parametresi eklendi (NameError biter)
+async def build_rows_from_is_list(
+    is_list: List[str],
+    xu100_change: float = _NAN,
+    tv_map: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> List[Dict[str, Any]]:
+    # Her ticker bir kez normalize edilir; TV sembolleri de bu kısa adlardan türer
+    shorts = shorts_for(is_list)
+
+    # tv_map verilmişse (önceden paralel çekildiyse) tekrar tarama yapma
+    if tv_map is None:
+        # satırlar open'ı kullanmıyor: daha az kolon → daha küçük cevap
+        tv_map = await tv_scan_symbols(tv_symbols_for(is_list, shorts), TV_ROW_COLUMNS)
+
+    # Tek geçiş: eksik sembol de aynı şablonla (NaN) üretilir, iki ayrı dal yok
+    empty: Dict[str, Any] = {}
+    tv_get = tv_map.get
     rows: List[Dict[str, Any]] = []
-    for original in is_list:
-        short = normalize_is_ticker(original).split(":")[-1]
-        d = tv_map.get(short, {})
-        if not d:
-            rows.append(
-                {
-                    "ticker": short,
-                    "close": float("nan"),
-                    "change": float("nan"),
-                    "volume": float("nan"),
-                    "signal": "-",
-                    "signal_text": "",
-                }
-            )
-        else:
-            rows.append(
-                {
-                    "ticker": short,
-                    "close": d.get("close", float("nan")),
-                    "change": d.get("change", float("nan")),
-                    "volume": d.get("volume", float("nan")),
-                    "signal": "-",
-                    "signal_text": "",
-                }
-            )
+    append = rows.append
+    for short in shorts:
+        dg = (tv_get(short) or empty).get
+        append(
+            {
+                "ticker": short,
+                "close": dg("close", _NAN),
+                "change": dg("change", _NAN),
+                "volume": dg("volume", _NAN),
+                "signal": "-",
+                "signal_text": "",
+            }
+        )
 
     # R0 etiketi fail-safe
     try:
@@ -2210,98 +2783,101 @@ async def build_rows_from_is_list(is_list: List[str], xu100_change: float = floa
 # =========================================================
 # Signal logic (TopN threshold)
 # =========================================================
+def _vol_sort_key(r: Dict[str, Any]) -> float:
+    v = r.get("volume")
+    return (v or 0) if v == v else 0
+
+
+def top_by_volume(rows: List[Dict[str, Any]], n: int) -> List[Dict[str, Any]]:
+    # Tam sort + slice yerine sadece ilk n: O(len * log n)
+    return heapq.nlargest(max(0, int(n)), rows, key=_vol_sort_key)
+
 def compute_volume_threshold(rows: List[Dict[str, Any]], top_n: int) -> float:
-    rows_with_vol = [
-        r for r in rows
-        if isinstance(r.get("volume"), (int, float)) and not math.isnan(r["volume"])
+    vols = [
+        v for v in (r.get("volume") for r in rows)
+        if isinstance(v, (int, float)) and v == v
     ]
-    if not rows_with_vol:
+    if not vols:
         return float("inf")
 
+    # Sadece N. en büyük hacim lazım: tam sort yerine kısmi seçim
     n = max(1, int(top_n))
-    ranked = sorted(
-        rows_with_vol,
-        key=lambda x: x.get("volume", 0) or 0,
-        reverse=True
-    )
-    top = ranked[:n]
-    base = float(top[-1]["volume"]) if top else float("inf")
-
-    try:
-        factor = float(os.getenv("TOPN_THRESHOLD_FACTOR", "1.00"))
-    except Exception:
-        factor = 1.00
-
-    if factor <= 0:
-        factor = 1.00
-
-    return base * factor
+    top = heapq.nlargest(n, vols)
+    base = float(top[-1]) if top else float("inf")
+    return base * TOPN_THRESHOLD_FACTOR
 
 def compute_signal_rows(rows: List[Dict[str, Any]], xu100_change: float, top_n: int) -> float:
     threshold = compute_volume_threshold(rows, top_n)
     _apply_signals_with_threshold(rows, xu100_change, threshold)
     return threshold
 
+_SIG_NONE = ("-", "")
+_SIG_KAR = ("⚠️", "KÂR KORUMA")
+_SIG_AYRISMA = ("🧠", "AYRIŞMA")
+_SIG_TOPLAMA = ("🧠", "TOPLAMA")
+_SIG_DIP = ("🧲", "DİP TOPLAMA")
+
+
 def _apply_signals_with_threshold(rows: List[Dict[str, Any]], xu100_change: float, min_vol_threshold: float) -> None:
+    # Satırdan bağımsız koşul döngü dışında bir kez
+    xu_weak = (xu100_change == xu100_change) and (xu100_change <= -0.80)
+
     for r in rows:
         # R0 yakalandıysa üstüne yazma (opsiyonel ama güzel)
         if r.get("signal_text") == "UÇAN (R0)":
             continue
 
-        ch = r.get("change", float("nan"))
-        vol = r.get("volume", float("nan"))
+        # Tek karar ağacı: her satırın alanları bir kez okunur, sonuç tek atamayla yazılır
+        ch = r.get("change", _NAN)
         if ch != ch:
-            r["signal"] = "-"
-            r["signal_text"] = ""
-            continue
-        if ch >= 4.0:
-            r["signal"] = "⚠️"
-            r["signal_text"] = "KÂR KORUMA"
-            continue
-
-        in_topN = (vol == vol) and (vol >= min_vol_threshold)
-
-        if in_topN and (xu100_change == xu100_change) and (xu100_change <= -0.80) and (ch >= 0.40):
-            r["signal"] = "🧠"
-            r["signal_text"] = "AYRIŞMA"
-            continue
-
-        if in_topN and (0.00 <= ch <= 0.60):
-            r["signal"] = "🧠"
-            r["signal_text"] = "TOPLAMA"
-            continue
-        if in_topN and (-0.60 <= ch < 0.00):
-            r["signal"] = "🧲"
-            r["signal_text"] = "DİP TOPLAMA"
-            continue
+            sig = _SIG_NONE
+        elif ch >= 4.0:
+            sig = _SIG_KAR
+        else:
+            vol = r.get("volume", _NAN)
+            if not ((vol == vol) and (vol >= min_vol_threshold)):
+                sig = _SIG_NONE
+            elif xu_weak and ch >= 0.40:
+                sig = _SIG_AYRISMA
+            elif 0.00 <= ch <= 0.60:
+                sig = _SIG_TOPLAMA
+            elif -0.60 <= ch < 0.00:
+                sig = _SIG_DIP
+            else:
+                sig = _SIG_NONE
 
-        r["signal"] = "-"
-        r["signal_text"] = ""
+        r["signal"], r["signal_text"] = sig
 
 # =========================================================
 # Table view
 # =========================================================
+# Satır şablonları bir kez: her satırda f-string format spec'i yeniden parse edilmez
+_TABLE_ROW_FMT = "{:<5} {:<1} {:>6} {:>8} {:>6} {:>5}".format
+_TABLE_ROW_FMT_K = "{:<5} {:<1} {:<3} {:>6} {:>8} {:>6} {:>5}".format
+
+
 def make_table(rows: List[Dict[str, Any]], title: str, include_kind: bool = False) -> str:
     if include_kind:
-        header = f"{'HIS':<5} {'S':<1} {'K':<3} {'%':>6} {'FYT':>8} {'HCM':>6} {'SCR':>5}"
+        header = _TABLE_ROW_FMT_K("HIS", "S", "K", "%", "FYT", "HCM", "SCR")
     else:
-        header = f"{'HIS':<5} {'S':<1} {'%':>6} {'FYT':>8} {'HCM':>6} {'SCR':>5}"
+        header = _TABLE_ROW_FMT("HIS", "S", "%", "FYT", "HCM", "SCR")
 
     sep = "-" * len(header)
-    lines = [title, "<pre>", header, sep]
+    fmt_vol = format_volume
+    row_fmt = _TABLE_ROW_FMT
+    row_fmt_k = _TABLE_ROW_FMT_K
 
-    for r in rows:
+    def _line(r: Dict[str, Any]) -> str:
         t = (r.get("ticker", "n/a") or "n/a")[:5]
         sig = (r.get("signal", "-") or "-")[:1]
 
-        ch = r.get("change", float("nan"))
-        cl = r.get("close", float("nan"))
-        vol = r.get("volume", float("nan"))
+        ch = r.get("change", _NAN)
+        cl = r.get("close", _NAN)
         score = r.get("accumulation_score", 0)
 
         ch_s = "n/a" if (ch != ch) else f"{ch:+.2f}"
         cl_s = "n/a" if (cl != cl) else f"{cl:.2f}"
-        vol_s = format_volume(vol)[:6]
+        vol_s = fmt_vol(r.get("volume", _NAN))[:6]
 
         try:
             score_s = f"{int(score)}/10" if score is not None else "-"
@@ -2309,13 +2885,13 @@ def make_table(rows: List[Dict[str, Any]], title: str, include_kind: bool = Fals
             score_s = "-"
 
         if include_kind:
-            k = st_short(r.get("signal_text", ""))
-            lines.append(f"{t:<5} {sig:<1} {k:<3} {ch_s:>6} {cl_s:>8} {vol_s:>6} {score_s:>5}")
-        else:
-            lines.append(f"{t:<5} {sig:<1} {ch_s:>6} {cl_s:>8} {vol_s:>6} {score_s:>5}")
+            return row_fmt_k(t, sig, st_short(r.get("signal_text", "")), ch_s, cl_s, vol_s, score_s)
+        return row_fmt(t, sig, ch_s, cl_s, vol_s, score_s)
 
-    lines.append("</pre>")
-    return "\n".join(lines)
+    body = "\n".join(map(_line, rows))
+    if not body:
+        return f"{title}\n<pre>\n{header}\n{sep}\n</pre>"
+    return f"{title}\n<pre>\n{header}\n{sep}\n{body}\n</pre>"
 
 def parse_watch_args(args: List[str]) -> List[str]:
     if not args:
@@ -2329,7 +2905,7 @@ def parse_watch_args(args: List[str]) -> List[str]:
         parts.extend(p.split())
     out: List[str] = []
     for t in parts:
-        tt = re.sub(r"[^A-Za-z0-9:_\.]", "", t).upper()
+        tt = _TICKER_JUNK_RE.sub("", t).upper()
         if tt:
             out.append(tt)
     seen = set()
@@ -2343,6 +2919,19 @@ def parse_watch_args(args: List[str]) -> List[str]:
 # =========================================================
 # ✅ Yahoo Bootstrap
 # =========================================================
+_YH_SESSION = _make_http_session()
+# Stronger headers to reduce "bot" style blocks (Session'a bir kez; her GET'te dict kurulmaz)
+_YH_SESSION.headers.update({
+    "User-Agent": (
+        "Mozilla/5.0 (Linux; Android 14; SM-A725F) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/121.0.0.0 Mobile Safari/537.36"
+    ),
+    "Accept": "application/json,text/plain,*/*",
+    "Accept-Language": "tr-TR,tr;q=0.9,en-US;q=0.8,en;q=0.7",
+})
+
+@lru_cache(maxsize=1024)
 def _to_yahoo_symbol_bist(ticker: str) -> str:
     t = (ticker or "").strip().upper().replace("BIST:", "")
     if not t:
@@ -2384,115 +2973,101 @@ def yahoo_fetch_history_sync(symbol: str, days: int) -> List[Tuple[str, float, f
         "includeAdjustedClose": "true",
     }
 
-    # Stronger headers to reduce "bot" style blocks
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Linux; Android 14; SM-A725F) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/121.0.0.0 Mobile Safari/537.36"
-        ),
-        "Accept": "application/json,text/plain,*/*",
-        "Accept-Language": "tr-TR,tr;q=0.9,en-US;q=0.8,en;q=0.7",
-        "Connection": "keep-alive",
-    }
-
-    # Local import to avoid touching global imports
-    import random
-
-    # Use a Session for keep-alive (slightly friendlier / faster)
-    sess = requests.Session()
+    # Shared module-level Session (keep-alive pool + header'lar, bootstrap thread'leri de paylaşır)
+    sess = _YH_SESSION
 
-    # Try attempts, and within each attempt try both hosts (query1 -> query2)
+    # Geçici hatalar (bağlantı, 5xx) Session adapter'ındaki urllib3.Retry'da; burada
+    # sadece 401/403/429 bloklarında cooldown + yeni tur ve query1 -> query2 fallback var
     for attempt in range(3):
         last_err = None
+        blocked = False
 
         for base in base_urls:
             url = f"{base}/{sym}"
 
             try:
-                r = sess.get(url, params=params, timeout=YAHOO_TIMEOUT, headers=headers)
-
-                # If Yahoo is rate-limiting / blocking, back off harder and try again
-                if r.status_code in (401, 403, 429):
-                    # stronger cooldown on blocked
-                    sleep_s = max(float(YAHOO_SLEEP_SEC), 0.5) * (attempt + 1) * 4.0
-                    sleep_s += random.uniform(0.0, 0.6)
-                    logger.warning("Yahoo blocked/limited (%s) sym=%s attempt=%d sleep=%.2fs",
-                                   r.status_code, sym, attempt + 1, sleep_s)
-                    time.sleep(sleep_s)
-                    last_err = Exception(f"blocked_or_limited_{r.status_code}")
-                    continue
+                r = sess.get(url, params=params, timeout=YAHOO_TIMEOUT)
+            except Exception as e:
+                # adapter retry'ları tükendi: diğer host'u dene, tur tekrarlama
+                last_err = e
+                logger.warning("Yahoo fetch error (%s) attempt=%d host=%s: %s",
+                               sym, attempt + 1, base, e)
+                continue
 
-                # If query1 returns 404, try query2 immediately
-                if r.status_code == 404:
-                    # her iki host da 404 verirse sembol büyük ihtimalle Yahoo tarafında yok
-                    last_err = Exception("404_not_found")
-                    continue
+            # If Yahoo is rate-limiting / blocking, back off harder and try again
+            if r.status_code in (401, 403, 429):
+                # stronger cooldown on blocked
+                sleep_s = max(float(YAHOO_SLEEP_SEC), 0.5) * (attempt + 1) * 4.0
+                sleep_s += random.uniform(0.0, 0.6)
+                logger.warning("Yahoo blocked/limited (%s) sym=%s attempt=%d sleep=%.2fs",
+                               r.status_code, sym, attempt + 1, sleep_s)
+                time.sleep(sleep_s)
+                last_err = Exception(f"blocked_or_limited_{r.status_code}")
+                blocked = True
+                continue
 
-                r.raise_for_status()
+            # If query1 returns 404, try query2 immediately
+            if r.status_code == 404:
+                # her iki host da 404 verirse sembol büyük ihtimalle Yahoo tarafında yok
+                last_err = Exception("404_not_found")
+                continue
 
-                try:
-                    j = r.json() or {}
-                except Exception:
-                    # JSON parse fail: treat as empty and retry
-                    last_err = Exception("json_parse_failed")
-                    continue
+            if r.status_code >= 400:
+                # 5xx burada adapter retry'ları sonrası kalan cevaptır
+                last_err = Exception(f"http_{r.status_code}")
+                continue
 
-                chart = (j.get("chart") or {})
-                res = (chart.get("result") or [])
-                if not res:
-                    # Sometimes Yahoo returns chart.error; treat as empty
-                    last_err = Exception("empty_result")
-                    continue
+            try:
+                j = _json_loads(r.content) or {}
+            except Exception:
+                last_err = Exception("json_parse_failed")
+                continue
 
-                res0 = res[0]
-                ts_list = res0.get("timestamp") or []
-                ind = (res0.get("indicators") or {}).get("quote") or []
-                if not ind:
-                    last_err = Exception("no_indicators")
-                    continue
+            chart = (j.get("chart") or {})
+            res = (chart.get("result") or [])
+            if not res:
+                # Sometimes Yahoo returns chart.error; treat as empty
+                last_err = Exception("empty_result")
+                continue
+
+            res0 = res[0]
+            ts_list = res0.get("timestamp") or []
+            ind = (res0.get("indicators") or {}).get("quote") or []
+            if not ind:
+                last_err = Exception("no_indicators")
+                continue
 
-                q0 = ind[0]
-                closes = q0.get("close") or []
-                vols = q0.get("volume") or []
+            q0 = ind[0]
+            closes = q0.get("close") or []
+            vols = q0.get("volume") or []
 
-                out: List[Tuple[str, float, float]] = []
-                for i, ts in enumerate(ts_list):
-                    if i >= len(closes) or i >= len(vols):
-                        continue
-                    c = closes[i]
-                    v = vols[i]
-                    if c is None or v is None:
-                        continue
-                    dt = datetime.fromtimestamp(int(ts), tz=TZ).date()
-                    day_s = dt.strftime("%Y-%m-%d")
-                    out.append((day_s, float(c), float(v)))
+            out: List[Tuple[str, float, float]] = []
+            for i, ts in enumerate(ts_list):
+                if i >= len(closes) or i >= len(vols):
+                    continue
+                c = closes[i]
+                v = vols[i]
+                if c is None or v is None:
+                    continue
+                dt = datetime.fromtimestamp(int(ts), tz=TZ).date()
+                day_s = dt.strftime("%Y-%m-%d")
+                out.append((day_s, float(c), float(v)))
 
-                if days > 0 and len(out) > days:
-                    out = out[-days:]
+            if days > 0 and len(out) > days:
+                out = out[-days:]
 
-                return out
+            return out
 
-            except Exception as e:
-                last_err = e
-                # mild backoff between host tries / attempts
-                sleep_s = max(float(YAHOO_SLEEP_SEC), 0.4) * (attempt + 1)
-                sleep_s += random.uniform(0.0, 0.4)
-                logger.warning("Yahoo fetch error (%s) attempt=%d host=%s: %s",
-                               sym, attempt + 1, base, e)
-                time.sleep(sleep_s)
         # Eğer iki host da 404 döndüyse, sembolü geçici BAD listeye al
         if last_err is not None and "404_not_found" in str(last_err):
             _yahoo_mark_bad(sym)
             return []
 
-        # If both hosts failed for this attempt, do a slightly longer cooloff
-        cooloff = max(float(YAHOO_SLEEP_SEC), 0.6) * (attempt + 1) * 2.0
-        cooloff += random.uniform(0.0, 0.8)
-        if last_err is not None:
-            logger.warning("Yahoo fetch all-hosts failed sym=%s attempt=%d cooloff=%.2fs last=%s",
-                           sym, attempt + 1, cooloff, last_err)
-        time.sleep(cooloff)
+        # Blok yoksa yeni tur aynı sonucu verir: adapter zaten tekrar denedi
+        if not blocked:
+            if last_err is not None:
+                logger.warning("Yahoo fetch all-hosts failed sym=%s last=%s", sym, last_err)
+            return []
 
     return []
 
@@ -2500,55 +3075,69 @@ def yahoo_bootstrap_fill_history(tickers: List[str], days: int) -> Tuple[int, in
     if not tickers:
         return (0, 0)
 
-    price_hist = _load_json(PRICE_HISTORY_FILE)
-    vol_hist = _load_json(VOLUME_HISTORY_FILE)
-
-    if not isinstance(price_hist, dict):
-        price_hist = {}
-    if not isinstance(vol_hist, dict):
-        vol_hist = {}
-
-    total_points = 0
-    filled = 0
-
+    shorts: List[str] = []
     for t in tickers:
         short = (t or "").strip().upper().replace("BIST:", "")
-        if not short:
-            continue
+        if short:
+            shorts.append(short)
 
+    def _fetch(short: str) -> Tuple[str, List[Tuple[str, float, float]]]:
         sym = _to_yahoo_symbol_bist(short)
         logger.info("BOOTSTRAP fetching short=%s sym=%s days=%s", short, sym, days)
-
         # ✅ Bootstrap = parametre days (genelde 400)
         data = yahoo_fetch_history_sync(sym, days)
         logger.info("BOOTSTRAP fetched sym=%s data_len=%s", sym, 0 if not data else len(data))
+        return short, data
+
+    # Yahoo chart endpoint tek sembol alıyor; hisse başı sıralı istek + sleep yerine
+    # küçük batch'ler halinde paralel çekiyoruz, sleep batch başına bir kez.
+    # Önce tüm ağ çağrıları: history dosyaları bu dakikalar boyunca okunup tutulmaz
+    fetched: List[Tuple[str, List[Tuple[str, float, float]]]] = []
+    workers = max(1, YAHOO_BOOTSTRAP_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for batch in iter_chunks(shorts, workers):
+            for short, data in pool.map(_fetch, batch):
+                if data:
+                    fetched.append((short, data))
 
-        if not data:
             time.sleep(YAHOO_SLEEP_SEC)
-            continue
 
-        for day_s, close, vol in data:
-            price_hist.setdefault(day_s, {})
-            vol_hist.setdefault(day_s, {})
-            price_hist[day_s][short] = float(close)
-            vol_hist[day_s][short] = float(vol)
-            total_points += 1
-            filled += 1
-
-        time.sleep(YAHOO_SLEEP_SEC)
+    total_points = 0
+    filled = 0
 
-    _prune_days(price_hist, max(HISTORY_DAYS, days))
-    _prune_days(vol_hist, max(HISTORY_DAYS, days))
-    _atomic_write_json(PRICE_HISTORY_FILE, price_hist)
-    _atomic_write_json(VOLUME_HISTORY_FILE, vol_hist)
+    # Sadece load → merge → prune → write kilitli: arada alarm/radar/EOD yazımı kaybolmasın
+    with _HISTORY_LOCK:
+        price_hist = _load_json(PRICE_HISTORY_FILE)
+        vol_hist = _load_json(VOLUME_HISTORY_FILE)
+
+        if not isinstance(price_hist, dict):
+            price_hist = {}
+        if not isinstance(vol_hist, dict):
+            vol_hist = {}
+
+        for short, data in fetched:
+            for day_s, close, vol in data:
+                price_hist.setdefault(day_s, {})
+                vol_hist.setdefault(day_s, {})
+                price_hist[day_s][short] = _hist_price(close)
+                vol_hist[day_s][short] = _hist_volume(vol)
+                total_points += 1
+                filled += 1
+
+        _prune_days(price_hist, max(HISTORY_DAYS, days))
+        _prune_days(vol_hist, max(HISTORY_DAYS, days))
+        _atomic_write_json(PRICE_HISTORY_FILE, price_hist)
+        _atomic_write_json(VOLUME_HISTORY_FILE, vol_hist)
     return (filled, total_points)
 
 async def tradingview_bootstrap_fill_today(tickers: List[str]) -> Tuple[int, int]:
     if not tickers:
         return (0, 0)
 
+    # XU100 + liste tek POST; başarısızsa satırlar kendi taramasını yapar
+    tv_map: Optional[Dict[str, Dict[str, Any]]] = None
     try:
-        xu_close, xu_change, xu_vol, xu_open = await get_xu100_summary()
+        (xu_close, xu_change, xu_vol, xu_open), tv_map = await fetch_xu100_and_tv_map(tickers)
         update_index_history(
             today_key_tradingday(),
             xu_close,
@@ -2560,13 +3149,13 @@ async def tradingview_bootstrap_fill_today(tickers: List[str]) -> Tuple[int, int
         logger.warning("BOOTSTRAP TV | xu100 summary alınamadı: %s", e)
         xu_change = 0.0
 
-    rows = await build_rows_from_is_list(tickers, xu_change)
+    rows = await build_rows_from_is_list(tickers, xu_change, tv_map=tv_map or None)
 
     valid_rows: List[Dict[str, Any]] = []
     for r in (rows or []):
         t = (r.get("ticker") or "").strip().upper()
-        cl = r.get("close", float("nan"))
-        vol = r.get("volume", float("nan"))
+        cl = r.get("close", _NAN)
+        vol = r.get("volume", _NAN)
 
         if not t:
             continue
@@ -2585,7 +3174,7 @@ async def tradingview_bootstrap_fill_today(tickers: List[str]) -> Tuple[int, int
     if not valid_rows:
         return (0, 0)
 
-    update_history_from_rows(valid_rows)
+    await asyncio.to_thread(update_history_from_rows, valid_rows)
 
     filled = len(valid_rows)
     points = len(valid_rows)
@@ -2602,10 +3191,10 @@ async def yahoo_bootstrap_if_needed() -> str:
         if not empty and not BOOTSTRAP_FORCE:
             return "BOOTSTRAP atlandı (history dolu)."
 
-        bist200 = env_csv("BIST200_TICKERS")
+        bist200 = BIST200
         if not bist200:
             return "BOOTSTRAP: BIST200_TICKERS env boş."
-        tickers = [normalize_is_ticker(x).split(":")[-1] for x in bist200 if x.strip()]
+        tickers = list(BIST200_SHORTS)
 
         logger.info("BOOTSTRAP başlıyor… Yahoo %d gün (hisse=%d)", BOOTSTRAP_DAYS, len(tickers))
         logger.info("BOOTSTRAP DEBUG | tickers list: %s", tickers)
@@ -2622,9 +3211,14 @@ async def yahoo_bootstrap_if_needed() -> str:
 # =========================================================
 def tomorrow_score(row: Dict[str, Any]) -> float:
     t = row.get("ticker", "")
-    vol = row.get("volume", float("nan"))
-    kind = row.get("signal_text", "")
     st = compute_30d_stats(t) if t else None
+    return _tomorrow_score_with_stats(row, st)
+
+
+def _tomorrow_score_with_stats(row: Dict[str, Any], st: Optional[Dict[str, Any]]) -> float:
+    # st zaten hesaplandıysa history tekrar okunmasın
+    vol = row.get("volume", _NAN)
+    kind = row.get("signal_text", "")
     band = st.get("band_pct", 50.0) if st else 50.0
 
     kind_bonus = 0.0
@@ -2702,9 +3296,27 @@ def compute_resistance_from_stats(st: Dict[str, Any], current_price: Any = None)
 
     return 0.0
 
-def build_tomorrow_rows(all_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _top_scored(scored: List[Tuple[float, Dict[str, Any]]], n: int) -> List[Dict[str, Any]]:
+    # Skorlar önceden hesaplı; tam sort yerine sadece ilk n (sıra/eşitlik davranışı aynı)
+    return [r for _, r in heapq.nlargest(max(1, n), scored, key=lambda x: x[0])]
+
+
+def _cached_30d_stats(cache: Dict[str, Any], t: str) -> Optional[Dict[str, Any]]:
+    # Aynı ticker için stats /tomorrow içinde bir kez (strict + relaxed tur, ALTIN + ADAY listesi)
+    if t in cache:
+        return cache[t]
+    st = cache[t] = compute_30d_stats(t)
+    return st
+
+
+def build_tomorrow_rows(
+    all_rows: List[Dict[str, Any]],
+    stats_cache: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    cache = {} if stats_cache is None else stats_cache
+
     def _pass(relaxed: bool) -> List[Dict[str, Any]]:
-        out: List[Dict[str, Any]] = []
+        out: List[Tuple[float, Dict[str, Any]]] = []
         for r in all_rows:
             kind = r.get("signal_text", "")
 
@@ -2717,11 +3329,11 @@ def build_tomorrow_rows(all_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
             if not t:
                 continue
 
-            st = compute_30d_stats(t)
+            st = _cached_30d_stats(cache, t)
             if not st:
                 continue
 
-            ratio = st.get("ratio", float("nan"))
+            ratio = st.get("ratio", _NAN)
             band = st.get("band_pct", 50.0)
             resistance = compute_resistance_from_stats(st, r.get("close"))
 
@@ -2734,7 +3346,7 @@ def build_tomorrow_rows(all_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
             if band > max_band:
                 continue
 
-            out.append(r)
+            out.append((_tomorrow_score_with_stats(r, st), r))
             
             # BREAKOUT READY kontrolü
             try:
@@ -2748,12 +3360,15 @@ def build_tomorrow_rows(all_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
                     "pct_change": r.get("change"),
                 }
 
-                breakout_ready = build_breakout_ready_list([breakout_input])
-
-                if breakout_ready:
-                    r["breakout_ready"] = True
-                else:
-                    r["breakout_ready"] = False
+                # Tek satır için liste kurup kopyalayıp sıralamaya gerek yok;
+                # eşikler build_breakout_ready_list varsayılanlarıyla aynı
+                r["breakout_ready"] = is_breakout_ready(
+                    breakout_input,
+                    max_band_pct=2.4,
+                    max_distance_pct=0.75,
+                    min_volume_ratio=1.25,
+                    min_continuity=3,
+                )
 
                 # BREAKOUT SCORE
                 r["breakout_score"] = compute_breakout_score(breakout_input)
@@ -2782,8 +3397,7 @@ def build_tomorrow_rows(all_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
                 r["breakout_score"] = 0
                 r["accumulation_score"] = 0
 
-        out.sort(key=tomorrow_score, reverse=True)
-        return out[:max(1, TOMORROW_MAX)]
+        return _top_scored(out, TOMORROW_MAX)
 
     # 1) normal
     out = _pass(relaxed=False)
@@ -2795,11 +3409,16 @@ def build_tomorrow_rows(all_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     return out
 
 
-def build_candidate_rows(all_rows: List[Dict[str, Any]], gold_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def build_candidate_rows(
+    all_rows: List[Dict[str, Any]],
+    gold_rows: List[Dict[str, Any]],
+    stats_cache: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
     gold_set = set((r.get("ticker") or "").strip().upper() for r in (gold_rows or []))
+    cache = {} if stats_cache is None else stats_cache
 
     def _pass(relaxed: bool) -> List[Dict[str, Any]]:
-        out: List[Dict[str, Any]] = []
+        out: List[Tuple[float, Dict[str, Any]]] = []
         for r in all_rows:
             kind = r.get("signal_text", "")
             if kind not in ("TOPLAMA", "DİP TOPLAMA", "UÇAN (R0)") and not (CANDIDATE_INCLUDE_AYRISMA and kind == "AYRIŞMA"):
@@ -2809,11 +3428,11 @@ def build_candidate_rows(all_rows: List[Dict[str, Any]], gold_rows: List[Dict[st
             if not t or t in gold_set:
                 continue
 
-            st = compute_30d_stats(t)
+            st = _cached_30d_stats(cache, t)
             if not st:
                 continue
 
-            ratio = st.get("ratio", float("nan"))
+            ratio = st.get("ratio", _NAN)
             band = st.get("band_pct", 50.0)
 
             min_ratio = CANDIDATE_MIN_VOL_RATIO
@@ -2826,10 +3445,9 @@ def build_candidate_rows(all_rows: List[Dict[str, Any]], gold_rows: List[Dict[st
             if band > max_band:
                 continue
 
-            out.append(r)
+            out.append((_tomorrow_score_with_stats(r, st), r))
 
-        out.sort(key=tomorrow_score, reverse=True)
-        return out[:max(1, CANDIDATE_MAX)]
+        return _top_scored(out, CANDIDATE_MAX)
 
     out = _pass(relaxed=False)
     if not out:
@@ -2838,7 +3456,7 @@ def build_candidate_rows(all_rows: List[Dict[str, Any]], gold_rows: List[Dict[st
 
 
 def format_threshold(min_vol: float) -> str:
-    if not isinstance(min_vol, (int, float)) or math.isnan(min_vol) or min_vol == float("inf"):
+    if not isinstance(min_vol, (int, float)) or min_vol != min_vol or min_vol == float("inf"):
         return "n/a"
     return format_volume(min_vol)
 
@@ -2884,12 +3502,12 @@ def build_tomorrow_message(
     if gold_rows:
         for r in gold_rows[:min(len(gold_rows), ALARM_NOTE_MAX)]:
             t = r.get("ticker", "")
-            cl = r.get("close", float("nan"))
+            cl = r.get("close", _NAN)
             notes_lines.append(format_30d_note(t, cl))
     elif cand_rows:
         for r in cand_rows[:min(len(cand_rows), ALARM_NOTE_MAX)]:
             t = r.get("ticker", "")
-            cl = r.get("close", float("nan"))
+            cl = r.get("close", _NAN)
             notes_lines.append(format_30d_note(t, cl))
     else:
         notes_lines.append("<i>Not yok (liste boş).</i>")
@@ -2918,9 +3536,9 @@ def save_tomorrow_(
         items: List[Dict[str, Any]] = []
         for r in (tom_rows + cand_rows):
             t = (r.get("ticker") or "").strip().upper()
-            cl = r.get("close", float("nan"))
-            ch = r.get("change", float("nan"))
-            vol = r.get("volume", float("nan"))
+            cl = r.get("close", _NAN)
+            ch = r.get("change", _NAN)
+            vol = r.get("volume", _NAN)
 
             if (not t) or (cl != cl):
                 continue
@@ -2986,7 +3604,7 @@ def build_alarm_message(
     notes_lines = ["\n📌 <b>Arşiv Notlar (Disk)</b>"]
     for r in alarm_rows[:max(1, ALARM_NOTE_MAX)]:
         t = r.get("ticker", "")
-        cl = r.get("close", float("nan"))
+        cl = r.get("close", _NAN)
         if t:
             notes_lines.append(format_30d_note(t, cl))
     notes = "\n".join(notes_lines)
@@ -3050,11 +3668,7 @@ def filter_new_alarms(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
             continue
         if can_send_alarm_for(t, now_ts):
             out.append(r)
-    out = sorted(
-        out,
-        key=lambda x: (x.get("volume") or 0) if (x.get("volume") == x.get("volume")) else 0,
-        reverse=True
-    )
+    out.sort(key=_vol_sort_key, reverse=True)
     return out
 
 
@@ -3074,10 +3688,15 @@ def mark_whale_sent_today() -> None:
 
 def pct_change(a: float, b: float) -> float:
     if b == 0 or a != a or b != b:
-        return float("nan")
+        return _NAN
     return (a / b - 1.0) * 100.0
 
 
+def _whale_sort_key(x: Dict[str, Any]) -> Tuple[bool, float]:
+    # Önce 🐋🐋, sonra hacim oranı (büyükten küçüğe)
+    return (x.get("mark") == "🐋🐋", x.get("vol_ratio", 0))
+
+
 def build_whale_message(items: List[Dict[str, Any]], xu_close: float, xu_change: float, reg: Dict[str, Any]) -> str:
     now_s = now_tr().strftime("%H:%M")
     xu_close_s = "n/a" if (xu_close != xu_close) else f"{xu_close:,.2f}"
@@ -3096,9 +3715,9 @@ def build_whale_message(items: List[Dict[str, Any]], xu_close: float, xu_change:
     lines = [head, "\n<b>✅ DEVAM EDENLER</b>"]
     for it in items:
         t = it["ticker"]
-        volr = it.get("vol_ratio", float("nan"))
-        ch = it.get("change", float("nan"))
-        dd = it.get("dd_pct", float("nan"))
+        volr = it.get("vol_ratio", _NAN)
+        ch = it.get("change", _NAN)
+        dd = it.get("dd_pct", _NAN)
         mark = it.get("mark", "🐋")
         volr_s = "n/a" if volr != volr else f"{volr:.2f}x"
         ch_s = "n/a" if ch != ch else f"{ch:+.2f}%"
@@ -3111,6 +3730,73 @@ def build_whale_message(items: List[Dict[str, Any]], xu_close: float, xu_change:
 # =========================================================
 # Telegram Handlers
 # =========================================================
+def start_notice(update: Update, text: str) -> "asyncio.Task":
+    # "Hazırlanıyor" mesajını arka planda gönder; veri çekimi onu beklemesin
+    return asyncio.create_task(update.message.reply_text(text))
+
+
+async def finish_notice(task: "asyncio.Task") -> None:
+    # Sıra bozulmasın diye asıl rapordan önce notice'in bitmesini bekle
+    try:
+        await task
+    except Exception as e:
+        logger.warning("notice send failed: %s", e)
+
+
+# Telegram tek mesaj limiti 4096; HTML etiketleri için pay bırak
+TG_MSG_LIMIT = 4000
+
+
+def _split_long_section(sec: str, limit: int) -> List[str]:
+    # Tek bölüm limiti aşıyorsa satır sınırından böl; açık <pre> kapatılıp sonraki parçada yeniden açılır
+    parts: List[str] = []
+    cur: List[str] = []
+    size = 0
+    in_pre = False
+    for line in sec.split("\n"):
+        add = len(line) + 1
+        if cur and size + add + len("\n</pre>") > limit:
+            parts.append("\n".join(cur) + ("\n</pre>" if in_pre else ""))
+            cur = ["<pre>"] if in_pre else []
+            size = 6 if in_pre else 0
+        cur.append(line)
+        size += add
+        if "pre>" in line:
+            in_pre = line.rfind("<pre>") > line.rfind("</pre>")
+    if cur:
+        parts.append("\n".join(cur))
+    return parts
+
+
+def pack_sections(sections: List[str], limit: int = TG_MSG_LIMIT) -> List[str]:
+    """Bölümleri "\n\n" ile tek mesajda birleştirir; limit aşılırsa bölüm sınırından böler."""
+    msgs: List[str] = []
+    cur: List[str] = []
+    size = 0
+    flat: List[str] = []
+    for sec in sections:
+        if not sec:
+            continue
+        flat.extend(_split_long_section(sec, limit) if len(sec) > limit else (sec,))
+    for sec in flat:
+        add = len(sec) + (2 if cur else 0)
+        if cur and size + add > limit:
+            msgs.append("\n\n".join(cur))
+            cur, size = [sec], len(sec)
+        else:
+            cur.append(sec)
+            size += add
+    if cur:
+        msgs.append("\n\n".join(cur))
+    return msgs
+
+
+async def reply_sections(update: Update, sections: List[str]) -> None:
+    # Normalde tek API çağrısı; sadece 4K sınırı aşılırsa ek mesaj
+    for msg in pack_sections(sections):
+        await update.message.reply_text(msg, parse_mode=ParseMode.HTML, disable_web_page_preview=True)
+
+
 async def cmd_help(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     msg = (
         "🤖 <b>TAIPO PRO INTEL</b>\n"
@@ -3393,7 +4079,7 @@ async def cmd_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         await update.message.reply_text(msg, parse_mode=ParseMode.HTML)
         return
         return
-    t = re.sub(r"[^A-Za-z0-9:_\.]", "", context.args[0]).upper().replace("BIST:", "")
+    t = _TICKER_JUNK_RE.sub("", context.args[0]).upper().replace("BIST:", "")
     if not t:
         await update.message.reply_text("Kullanım: <code>/stats AKBNK</code>", parse_mode=ParseMode.HTML)
         return
@@ -3430,15 +4116,12 @@ async def cmd_bootstrap(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
                 mode = "yahoo"
                 continue
 
-            try:
-                n = int(re.sub(r"\D+", "", a))
-                if n > 0:
-                    days = n
-            except Exception:
-                pass
+            n = parse_int_arg(a)
+            if n:
+                days = n
 
     days = max(20, min(90, days))
-    bist200_list = env_csv("BIST200_TICKERS")
+    bist200_list = BIST200
 
     logger.info("BOOTSTRAP raw bist200 count=%s", len(bist200_list))
 
@@ -3448,28 +4131,20 @@ async def cmd_bootstrap(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         )
         return
 
-    tickers = [
-        normalize_is_ticker(x).split(":")[-1]
-        for x in bist200_list
-        if x and x.strip()
-    ]
+    tickers = list(BIST200_SHORTS)
 
     logger.info("BOOTSTRAP parsed ticker count=%s", len(tickers))
     logger.info("BOOTSTRAP first10=%s", tickers[:10])
 
     if mode == "yahoo":
-        await update.message.reply_text(
-            f"⏳ Bootstrap başlıyor… Yahoo’dan {days} gün çekiyorum."
-        )
+        notice = start_notice(update, f"⏳ Bootstrap başlıyor… Yahoo’dan {days} gün çekiyorum.")
         filled, points = await asyncio.to_thread(
             yahoo_bootstrap_fill_history,
             tickers,
             days,
         )
     else:
-        await update.message.reply_text(
-            "⏳ Bootstrap başlıyor… TradingView snapshot ile bugünkü close/hacim yazıyorum."
-        )
+        notice = start_notice(update, "⏳ Bootstrap başlıyor… TradingView snapshot ile bugünkü close/hacim yazıyorum.")
         filled, points = await tradingview_bootstrap_fill_today(tickers)
 
     logger.info(
@@ -3481,6 +4156,7 @@ async def cmd_bootstrap(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         HISTORY_DAYS,
     )
 
+    await finish_notice(notice)
     await update.message.reply_text(
         f"✅ Bootstrap tamam!\n"
         f"• Mod: <b>{mode.upper()}</b>\n"
@@ -3492,14 +4168,15 @@ async def cmd_bootstrap(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     )
 
 async def cmd_tomorrow(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    bist200_list = env_csv("BIST200_TICKERS")
+    bist200_list = BIST200
     if not bist200_list:
         await update.message.reply_text("❌ BIST200_TICKERS env boş. Render → Environment’a ekle.")
         return
 
-    await update.message.reply_text("⏳ Ertesi gün listesi hazırlanıyor...")
+    notice = start_notice(update, "⏳ Ertesi gün listesi hazırlanıyor...")
 
-    xu_close, xu_change, xu_vol, xu_open = await get_xu100_summary()
+    (xu_close, xu_change, xu_vol, xu_open), tv_map = await fetch_xu100_and_tv_map(bist200_list)
+    store_radar_snapshot((xu_close, xu_change, xu_vol, xu_open), tv_map)
     update_index_history(today_key_tradingday(), xu_close, xu_change, xu_vol, xu_open)
 
     reg = compute_regime(xu_close, xu_change, xu_vol, xu_open)
@@ -3507,8 +4184,8 @@ async def cmd_tomorrow(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     global LAST_REGIME
     LAST_REGIME = reg
 
-    rows = await build_rows_from_is_list(bist200_list, xu_change)
-    update_history_from_rows(rows)
+    rows = await build_rows_from_is_list(bist200_list, xu_change, tv_map=tv_map)
+    await asyncio.to_thread(update_history_from_rows, rows)
 
     min_vol = compute_signal_rows(rows, xu_change, VOLUME_TOP_N)
     thresh_s = format_threshold(min_vol)
@@ -3518,11 +4195,7 @@ async def cmd_tomorrow(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     r0_block = ""
 
     if r0_rows:
-        r0_rows = sorted(
-            r0_rows,
-            key=lambda x: (x.get("volume") or 0) if x.get("volume") == x.get("volume") else 0,
-            reverse=True
-        )[:8]
+        r0_rows = top_by_volume(r0_rows, 8)
 
         r0_block = make_table(
             r0_rows,
@@ -3541,8 +4214,9 @@ async def cmd_tomorrow(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     else:
         trade_mode = "ON"
 
-    tom_rows = build_tomorrow_rows(rows)
-    cand_rows = build_candidate_rows(rows, tom_rows)
+    stats_cache: Dict[str, Any] = {}
+    tom_rows = build_tomorrow_rows(rows, stats_cache)
+    cand_rows = build_candidate_rows(rows, tom_rows, stats_cache)
 
     save_tomorrow_(tom_rows, cand_rows, xu_change)
 
@@ -3573,6 +4247,7 @@ async def cmd_tomorrow(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             "• Rejim uygun, radar + trade birlikte değerlendirilebilir\n\n"
         ) + msg
 
+    await finish_notice(notice)
     await update.message.reply_text(
         msg,
         parse_mode=ParseMode.HTML,
@@ -3663,6 +4338,7 @@ async def cmd_tomorrow(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         }
 
         accumulation_rows = []
+        acc_keyed = []  # (sıralama anahtarı, satır): anahtar satır başına bir kez
 
         for r in (rows or []):
             t = (r.get("ticker") or "").strip().upper()
@@ -3718,20 +4394,20 @@ async def cmd_tomorrow(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             )
 
             accumulation_rows.append(r)
+            acc_keyed.append((
+                (
+                    r["acc_pro_score"],
+                    r.get("accumulation_score", 0),
+                    r.get("ratio", r.get("vol_ratio", 0)),
+                    -abs(r.get("change", r.get("pct_change", 0)) or 0),
+                ),
+                r,
+            ))
 
         logger.info("DEBUG ACCUMULATION COUNT = %s", len(accumulation_rows))
 
         if accumulation_rows:
-            accumulation_rows = sorted(
-                accumulation_rows,
-                key=lambda x: (
-                    x.get("acc_pro_score", 0),
-                    x.get("accumulation_score", 0),
-                    x.get("ratio", x.get("vol_ratio", 0)),
-                    -abs(x.get("change", x.get("pct_change", 0)) or 0),
-                ),
-                reverse=True,
-            )[:5]
+            accumulation_rows = [r for _, r in heapq.nlargest(5, acc_keyed, key=itemgetter(0))]
 
             accumulation_lines = []
 
@@ -3856,19 +4532,16 @@ async def cmd_balina(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
         await update.message.reply_text("❌ Balina radar kapalı.")
         return
 
-    await update.message.reply_text("🐋 Balina radar tarıyor...")
+    notice = start_notice(update, "🐋 Balina radar tarıyor...")
 
     try:
         msg = await build_balina_message()
-
-        await update.message.reply_text(
-            msg,
-            parse_mode=ParseMode.HTML,
-            disable_web_page_preview=True,
-        )
+        await finish_notice(notice)
+        await reply_sections(update, [msg])
 
     except Exception as e:
         logger.exception("balina error: %s", e)
+        await finish_notice(notice)
         await update.message.reply_text(f"/balina hata: {e}")
 
 async def job_balina_report(context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -3900,10 +4573,13 @@ async def job_balina_report(context: ContextTypes.DEFAULT_TYPE) -> None:
         logger.exception("BALINA AUTO job error: %s", e)
 
 async def cmd_band_scan(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    await update.message.reply_text("⏳ Band taraması hazırlanıyor...")
+    notice = start_notice(update, "⏳ Band taraması hazırlanıyor...")
 
-    rows_5 = build_band_scan_rows(days_window=5, limit=30)
-    rows_20 = build_band_scan_rows(days_window=20, limit=30)
+    # Disk okuma + hesap event loop'u kilitlemesin
+    rows_5, rows_20 = await asyncio.gather(
+        asyncio.to_thread(build_band_scan_rows, 5, 30),
+        asyncio.to_thread(build_band_scan_rows, 20, 30),
+    )
 
     part_5 = make_band_scan_table(
         rows_5,
@@ -3915,13 +4591,8 @@ async def cmd_band_scan(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         "📦 <b>20 GÜNLÜK DAR BANT – İLK 30</b>"
     ) if rows_20 else "❌ <b>20 GÜNLÜK bant listesi boş.</b>"
 
-    msg = part_5 + "\n\n" + part_20
-
-    await update.message.reply_text(
-        msg,
-        parse_mode=ParseMode.HTML,
-        disable_web_page_preview=True
-    )
+    await finish_notice(notice)
+    await reply_sections(update, [part_5, part_20])
 
 async def cmd_watch(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     watch = parse_watch_args(context.args)
@@ -3935,7 +4606,7 @@ async def cmd_watch(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         )
         return
 
-    xu_close, xu_change, xu_vol, xu_open = await get_xu100_summary()
+    (xu_close, xu_change, xu_vol, xu_open), tv_map = await fetch_xu100_and_rows_map(watch)
     update_index_history(
         today_key_tradingday(),
         xu_close,
@@ -3948,7 +4619,7 @@ async def cmd_watch(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     global LAST_REGIME
     LAST_REGIME = reg
 
-    rows = await build_rows_from_is_list(watch, xu_change)
+    rows = await build_rows_from_is_list(watch, xu_change, tv_map=tv_map)
     min_vol = compute_signal_rows(
         rows, xu_change, max(5, min(10, len(rows)))
     )
@@ -3973,33 +4644,38 @@ async def cmd_watch(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     )
 
 async def cmd_radar(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    bist200_list = env_csv("BIST200_TICKERS")
+    bist200_list = BIST200
     if not bist200_list:
         await update.message.reply_text("❌ BIST200_TICKERS env boş. Render → Environment’a ekle.")
         return
 
     page = 1
     if context.args:
-        try:
-            page = int(re.sub(r"\D+", "", context.args[0]) or "1")
-        except Exception:
-            page = 1
+        page = parse_int_arg(context.args[0], 1)
     page = max(1, page)
 
-    chunks = chunk_list(bist200_list, 25)
-    if page > len(chunks):
-        await update.message.reply_text(f"Sayfa yok. Toplam sayfa: {len(chunks)} (örn: /radar 1)")
+    total_pages = RADAR_TOTAL_PAGES
+    if page > total_pages:
+        await update.message.reply_text(f"Sayfa yok. Toplam sayfa: {total_pages} (örn: /radar 1)")
         return
 
-    xu_close, xu_change, xu_vol, xu_open = await get_xu100_summary()
+    page_list = radar_page(page)
+    # Taze snapshot varsa ağa çıkmadan sayfayı ondan kes
+    snap = get_radar_snapshot()
+    if snap is not None:
+        (xu_close, xu_change, xu_vol, xu_open), tv_map = snap
+    else:
+        # Tek POST ile tüm BIST200'ü çek: sonraki /radar 2..N sayfaları RAM'den gelsin
+        (xu_close, xu_change, xu_vol, xu_open), tv_map = await fetch_xu100_and_tv_map(BIST200)
+        store_radar_snapshot((xu_close, xu_change, xu_vol, xu_open), tv_map)
     update_index_history(today_key_tradingday(), xu_close, xu_change, xu_vol, xu_open)
     reg = compute_regime(xu_close, xu_change, xu_vol, xu_open)
 
     global LAST_REGIME
     LAST_REGIME = reg
 
-    rows = await build_rows_from_is_list(chunks[page - 1], xu_change)
-    update_history_from_rows(rows)
+    rows = await build_rows_from_is_list(page_list, xu_change, tv_map=tv_map)
+    await asyncio.to_thread(update_history_from_rows, rows)
     min_vol = compute_signal_rows(rows, xu_change, VOLUME_TOP_N)
     thresh_s = format_threshold(min_vol)
 
@@ -4010,14 +4686,10 @@ async def cmd_radar(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     r0_rows = [r for r in rows if r.get("signal_text") == "UÇAN (R0)"]
     r0_block = ""
     if r0_rows:
-        r0_rows = sorted(
-            r0_rows,
-            key=lambda x: (x.get("volume") or 0) if x.get("volume") == x.get("volume") else 0,
-            reverse=True
-        )[:8]
+        r0_rows = top_by_volume(r0_rows, 8)
         r0_block = make_table(r0_rows, "🚀 <b>R0 – UÇANLAR (Bu sayfada)</b>", include_kind=True) + "\n\n"
 
-    table = make_table(rows, f"📡 <b>BIST200 RADAR</b> • Sayfa {page}/{len(chunks)} • Top{VOLUME_TOP_N}≥<b>{thresh_s}</b>", include_kind=True)
+    table = make_table(rows, f"📡 <b>BIST200 RADAR</b> • Sayfa {page}/{total_pages} • Top{VOLUME_TOP_N}≥<b>{thresh_s}</b>", include_kind=True)
     head = (
         f"📡 <b>RADAR</b> • <b>{BOT_VERSION}</b>\n"
         f"📊 XU100: {xu_close:,.2f} • {xu_change:+.2f}%\n"
@@ -4027,13 +4699,15 @@ async def cmd_radar(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 
 
 async def cmd_eod(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    bist200_list = env_csv("BIST200_TICKERS")
+    bist200_list = BIST200
     if not bist200_list:
         await update.message.reply_text("❌ BIST200_TICKERS env boş. Render → Environment’a ekle.")
         return
-    await update.message.reply_text("⏳ EOD raporu hazırlanıyor...")
+    notice = start_notice(update, "⏳ EOD raporu hazırlanıyor...")
 
-    xu_close, xu_change, xu_vol, xu_open = await get_xu100_summary()
+    (xu_close, xu_change, xu_vol, xu_open), tv_map = await fetch_xu100_and_tv_map(bist200_list)
+    # Hemen ardından gelen /radar N aynı veriyi tekrar çekmesin
+    store_radar_snapshot((xu_close, xu_change, xu_vol, xu_open), tv_map)
     update_index_history(today_key_tradingday(), xu_close, xu_change, xu_vol, xu_open)
     reg = compute_regime(xu_close, xu_change, xu_vol, xu_open)
 
@@ -4047,32 +4721,40 @@ async def cmd_eod(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
             f"{format_regime_line(reg)}\n\n"
             f"⛔️ <b>Rejim BLOK (EOD gate açık).</b>"
         )
+        await finish_notice(notice)
         await update.message.reply_text(msg, parse_mode=ParseMode.HTML, disable_web_page_preview=True)
         return
 
-    rows = await build_rows_from_is_list(bist200_list, xu_change)
-    update_history_from_rows(rows)
+    rows = await build_rows_from_is_list(bist200_list, xu_change, tv_map=tv_map)
+    await asyncio.to_thread(update_history_from_rows, rows)
     min_vol = compute_signal_rows(rows, xu_change, VOLUME_TOP_N)
     thresh_s = format_threshold(min_vol)
 
-    toplama = [r for r in rows if r.get("signal_text") == "TOPLAMA"]
-    dip = [r for r in rows if r.get("signal_text") == "DİP TOPLAMA"]
-    ayr = [r for r in rows if r.get("signal_text") == "AYRIŞMA"]
-    kar = [r for r in rows if r.get("signal_text") == "KÂR KORUMA"]
-
-    def top_by_vol(lst: List[Dict[str, Any]], n: int = 10) -> List[Dict[str, Any]]:
-        return sorted(lst, key=lambda x: (x.get("volume") or 0) if x.get("volume") == x.get("volume") else 0, reverse=True)[:n]
-
-    msg = (
+    # Dört ayrı filtre turu yerine tek geçişte kovalara ayır
+    buckets: Dict[str, List[Dict[str, Any]]] = {"TOPLAMA": [], "DİP TOPLAMA": [], "AYRIŞMA": [], "KÂR KORUMA": []}
+    for r in rows:
+        b = buckets.get(r.get("signal_text"))
+        if b is not None:
+            b.append(r)
+    toplama = buckets["TOPLAMA"]
+    dip = buckets["DİP TOPLAMA"]
+    ayr = buckets["AYRIŞMA"]
+    kar = buckets["KÂR KORUMA"]
+
+    header = (
         f"📌 <b>EOD RAPOR</b> • <b>{BOT_VERSION}</b>\n"
         f"📊 <b>XU100</b>: {xu_close:,.2f} • {xu_change:+.2f}%\n"
         f"{format_regime_line(reg)}\n"
         f"🧱 <b>Top{VOLUME_TOP_N} Eşik</b>: ≥ <b>{thresh_s}</b>\n\n"
-        f"🧠 TOPLAMA: <b>{len(toplama)}</b> | 🧲 DİP: <b>{len(dip)}</b> | 🧠 AYR: <b>{len(ayr)}</b> | ⚠️ KAR: <b>{len(kar)}</b>\n"
+        f"🧠 TOPLAMA: <b>{len(toplama)}</b> | 🧲 DİP: <b>{len(dip)}</b> | 🧠 AYR: <b>{len(ayr)}</b> | ⚠️ KAR: <b>{len(kar)}</b>"
     )
-    msg += "\n" + make_table(top_by_vol(toplama, 8), "🧠 <b>TOPLAMA – Top 8</b>", include_kind=True)
-    msg += "\n\n" + make_table(top_by_vol(dip, 8), "🧲 <b>DİP TOPLAMA – Top 8</b>", include_kind=True)
-    await update.message.reply_text(msg, parse_mode=ParseMode.HTML, disable_web_page_preview=True)
+    sections = [
+        header,
+        make_table(top_by_volume(toplama, 8), "🧠 <b>TOPLAMA – Top 8</b>", include_kind=True),
+        make_table(top_by_volume(dip, 8), "🧲 <b>DİP TOPLAMA – Top 8</b>", include_kind=True),
+    ]
+    await finish_notice(notice)
+    await reply_sections(update, sections)
 
 
 async def cmd_whale(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -4085,7 +4767,7 @@ async def cmd_whale(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         return
 
     tickers = [it.get("ticker") for it in y_items if it.get("ticker")]
-    xu_close, xu_change, xu_vol, xu_open = await get_xu100_summary()
+    (xu_close, xu_change, xu_vol, xu_open), tv_map = await fetch_xu100_and_rows_map(tickers)
     update_index_history(today_key_tradingday(), xu_close, xu_change, xu_vol, xu_open)
     reg = compute_regime(xu_close, xu_change, xu_vol, xu_open)
 
@@ -4096,10 +4778,12 @@ async def cmd_whale(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         await update.message.reply_text(f"{format_regime_line(reg)}\n\n⛔️ Rejim BLOK → whale kontrolü atlandı.", parse_mode=ParseMode.HTML)
         return
 
-    rows = await build_rows_from_is_list(tickers, xu_change)
-    update_history_from_rows(rows)
+    rows = await build_rows_from_is_list(tickers, xu_change, tv_map=tv_map)
+    await asyncio.to_thread(update_history_from_rows, rows)
 
     ref_map = {it["ticker"]: safe_float(it.get("ref_close")) for it in y_items if it.get("ticker")}
+    # Endeks koşulu döngü boyunca sabit: bir kez hesapla
+    index_bad = WHALE_INDEX_BONUS and (xu_change == xu_change) and (xu_change <= 0)
     out = []
     for r in rows:
         t = r.get("ticker", "")
@@ -4109,12 +4793,12 @@ async def cmd_whale(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         st = compute_30d_stats(t)
         if not st:
             continue
-        avg_vol = st.get("avg_vol", float("nan"))
-        today_vol = r.get("volume", float("nan"))
-        today_close = r.get("close", float("nan"))
-        ch = r.get("change", float("nan"))
+        avg_vol = st.get("avg_vol", _NAN)
+        today_vol = r.get("volume", _NAN)
+        today_close = r.get("close", _NAN)
+        ch = r.get("change", _NAN)
 
-        vol_ratio = (today_vol / avg_vol) if (avg_vol == avg_vol and avg_vol > 0 and today_vol == today_vol) else float("nan")
+        vol_ratio = (today_vol / avg_vol) if (avg_vol == avg_vol and avg_vol > 0 and today_vol == today_vol) else _NAN
         dd_pct = pct_change(today_close, ref_close)
 
         if vol_ratio != vol_ratio or vol_ratio < WHALE_MIN_VOL_RATIO:
@@ -4123,19 +4807,19 @@ async def cmd_whale(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
             continue
 
         mark = "🐋"
-        if WHALE_INDEX_BONUS and (xu_change == xu_change) and (xu_change <= 0) and (ch == ch) and (ch >= WHALE_MIN_POSITIVE_WHEN_INDEX_BAD):
+        if index_bad and (ch == ch) and (ch >= WHALE_MIN_POSITIVE_WHEN_INDEX_BAD):
             mark = "🐋🐋"
 
         out.append({
             "ticker": t,
             "vol_ratio": float(vol_ratio),
-            "change": float(ch) if ch == ch else float("nan"),
+            "change": float(ch) if ch == ch else _NAN,
             "dd_pct": float(dd_pct),
             "mark": mark,
         })
 
-    out.sort(key=lambda x: (x.get("mark") == "🐋🐋", x.get("vol_ratio", 0)), reverse=True)
-    msg = build_whale_message(out[:12], xu_close, xu_change, reg)
+    top = heapq.nlargest(12, out, key=_whale_sort_key)
+    msg = build_whale_message(top, xu_close, xu_change, reg)
     await update.message.reply_text(msg, parse_mode=ParseMode.HTML, disable_web_page_preview=True)
 
 
@@ -4148,13 +4832,14 @@ async def job_alarm_scan(context: ContextTypes.DEFAULT_TYPE, force: bool = False
     if (not force) and (not within_alarm_window(now_tr())):
         return
 
-    bist200_list = env_csv("BIST200_TICKERS")
+    bist200_list = BIST200
     if not bist200_list:
         return
 
     try:
-        # XU100
-        xu_close, xu_change, xu_vol, xu_open = await get_xu100_summary()
+        # XU100 + BIST200 tek POST: aynı dakikadaki /eod, /radar çağrıları cache'ten beslenir
+        (xu_close, xu_change, xu_vol, xu_open), tv_map = await fetch_xu100_and_tv_map(bist200_list)
+        store_radar_snapshot((xu_close, xu_change, xu_vol, xu_open), tv_map)
         update_index_history(today_key_tradingday(), xu_close, xu_change, xu_vol, xu_open)
         reg = compute_regime(xu_close, xu_change, xu_vol, xu_open)
         await maybe_send_rejim_transition(context, reg)
@@ -4166,8 +4851,8 @@ async def job_alarm_scan(context: ContextTypes.DEFAULT_TYPE, force: bool = False
             return
 
         # --- Ana liste (BIST200) ---
-        all_rows = await build_rows_from_is_list(bist200_list, xu_change)
-        update_history_from_rows(all_rows)
+        all_rows = await build_rows_from_is_list(bist200_list, xu_change, tv_map=tv_map)
+        await asyncio.to_thread(update_history_from_rows, all_rows)
         min_vol = compute_signal_rows(all_rows, xu_change, VOLUME_TOP_N)
         thresh_s = format_threshold(min_vol)
 
@@ -4221,7 +4906,7 @@ async def job_alarm_scan(context: ContextTypes.DEFAULT_TYPE, force: bool = False
 
             ref_close_map = chain.get("ref_close", {}) or {}
             if not altin_tickers:
-                altin_tickers = list(ref_close_map.keys())[:6]
+                altin_tickers = list(islice(ref_close_map, 6))
 
             perf_lines = []
             for t in altin_tickers[:6]:
@@ -4288,12 +4973,8 @@ async def job_momo_scan(context: ContextTypes.DEFAULT_TYPE) -> None:
     try:
         now = datetime.now(TZ)
 
-        sh = int(os.getenv("MOMO_START_HOUR", "10"))
-        sm = int(os.getenv("MOMO_START_MINUTE", "0"))
-        eh = int(os.getenv("MOMO_END_HOUR", "18"))
-        em = int(os.getenv("MOMO_END_MINUTE", "0"))
-
-        if (now.hour, now.minute) < (sh, sm) or (now.hour, now.minute) > (eh, em):
+        hm = (now.hour, now.minute)
+        if hm < MOMO_START_HM or hm > MOMO_END_HM:
             return
 
         logger.info("MOMO_SCAN tick: %s", now.isoformat())
@@ -4325,7 +5006,7 @@ async def job_tomorrow_list(context: ContextTypes.DEFAULT_TYPE) -> None:
     if not ALARM_ENABLED or not ALARM_CHAT_ID:
         return
 
-    bist200_list = env_csv("BIST200_TICKERS")
+    bist200_list = BIST200
     if not bist200_list:
         return
 
@@ -4336,14 +5017,16 @@ async def job_tomorrow_list(context: ContextTypes.DEFAULT_TYPE) -> None:
         if TOMORROW_DELAY_MIN > 0:
             await asyncio.sleep(max(0, int(TOMORROW_DELAY_MIN)) * 60)
 
-        xu_close, xu_change, xu_vol, xu_open = await get_xu100_summary()
+        # XU100 + BIST200 paralel; sonuç /radar snapshot'ına da yazılır
+        (xu_close, xu_change, xu_vol, xu_open), tv_map = await fetch_xu100_and_tv_map(bist200_list)
+        store_radar_snapshot((xu_close, xu_change, xu_vol, xu_open), tv_map)
         update_index_history(today_key_tradingday(), xu_close, xu_change, xu_vol, xu_open)
         reg = compute_regime(xu_close, xu_change, xu_vol, xu_open)
 
         LAST_REGIME = reg
 
-        rows = await build_rows_from_is_list(bist200_list, xu_change)
-        update_history_from_rows(rows)
+        rows = await build_rows_from_is_list(bist200_list, xu_change, tv_map=tv_map)
+        await asyncio.to_thread(update_history_from_rows, rows)
         min_vol = compute_signal_rows(rows, xu_change, VOLUME_TOP_N)
         thresh_s = format_threshold(min_vol)
 
@@ -4352,13 +5035,7 @@ async def job_tomorrow_list(context: ContextTypes.DEFAULT_TYPE) -> None:
         r0_block = ""
 
         if r0_rows:
-            r0_rows = sorted(
-                r0_rows,
-                key=lambda x: (x.get("volume") or 0)
-                if x.get("volume") == x.get("volume")
-                else 0,
-                reverse=True,
-            )[:8]
+            r0_rows = top_by_volume(r0_rows, 8)
 
             r0_block = (
                 make_table(
@@ -4380,8 +5057,9 @@ async def job_tomorrow_list(context: ContextTypes.DEFAULT_TYPE) -> None:
         else:
             trade_mode = "ON"
 
-        tom_rows = build_tomorrow_rows(rows)
-        cand_rows = build_candidate_rows(rows, tom_rows)
+        stats_cache: Dict[str, Any] = {}
+        tom_rows = build_tomorrow_rows(rows, stats_cache)
+        cand_rows = build_candidate_rows(rows, tom_rows, stats_cache)
         save_tomorrow_(tom_rows, cand_rows, xu_change)
 
         # ==============================
@@ -4521,11 +5199,11 @@ async def job_altin_live_follow(context: ContextTypes.DEFAULT_TYPE, force: bool
 
         # ALTIN tickers yoksa ref map'ten üret
         if not altin_tickers:
-            altin_tickers = list(ref_close_map.keys())[:6]
+            altin_tickers = list(islice(ref_close_map, 6))
 
         # ADAY tickers yoksa aday_ref map'ten üret
         if not aday_tickers:
-            aday_tickers = list(aday_ref_close_map.keys())[:6]
+            aday_tickers = list(islice(aday_ref_close_map, 6))
 
         # ALTIN ve ADAY ikisi de boşsa uyar ve çık
         if not altin_tickers and not aday_tickers:
@@ -4738,7 +5416,7 @@ async def job_whale_follow(context: ContextTypes.DEFAULT_TYPE) -> None:
         if not tickers:
             return
 
-        xu_close, xu_change, xu_vol, xu_open = await get_xu100_summary()
+        (xu_close, xu_change, xu_vol, xu_open), tv_map = await fetch_xu100_and_rows_map(tickers)
         update_index_history(today_key_tradingday(), xu_close, xu_change, xu_vol, xu_open)
         reg = compute_regime(xu_close, xu_change, xu_vol, xu_open)
 
@@ -4748,10 +5426,11 @@ async def job_whale_follow(context: ContextTypes.DEFAULT_TYPE) -> None:
         if REJIM_GATE_WHALE and reg.get("block"):
             return
 
-        rows = await build_rows_from_is_list(tickers, xu_change)
-        update_history_from_rows(rows)
+        rows = await build_rows_from_is_list(tickers, xu_change, tv_map=tv_map)
+        await asyncio.to_thread(update_history_from_rows, rows)
 
         ref_map = {it["ticker"]: safe_float(it.get("ref_close")) for it in y_items if it.get("ticker")}
+        index_bad = WHALE_INDEX_BONUS and (xu_change == xu_change) and (xu_change <= 0)
         out = []
         for r in rows:
             t = r.get("ticker", "")
@@ -4763,15 +5442,15 @@ async def job_whale_follow(context: ContextTypes.DEFAULT_TYPE) -> None:
             if not st:
                 continue
 
-            avg_vol = st.get("avg_vol", float("nan"))
-            today_vol = r.get("volume", float("nan"))
-            today_close = r.get("close", float("nan"))
-            ch = r.get("change", float("nan"))
+            avg_vol = st.get("avg_vol", _NAN)
+            today_vol = r.get("volume", _NAN)
+            today_close = r.get("close", _NAN)
+            ch = r.get("change", _NAN)
 
             vol_ratio = (
                 (today_vol / avg_vol)
                 if (avg_vol == avg_vol and avg_vol > 0 and today_vol == today_vol)
-                else float("nan")
+                else _NAN
             )
             dd_pct = pct_change(today_close, ref_close)
 
@@ -4781,20 +5460,14 @@ async def job_whale_follow(context: ContextTypes.DEFAULT_TYPE) -> None:
                 continue
 
             mark = "🐋"
-            if (
-                WHALE_INDEX_BONUS
-                and (xu_change == xu_change)
-                and (xu_change <= 0)
-                and (ch == ch)
-                and (ch >= WHALE_MIN_POSITIVE_WHEN_INDEX_BAD)
-            ):
+            if index_bad and (ch == ch) and (ch >= WHALE_MIN_POSITIVE_WHEN_INDEX_BAD):
                 mark = "🐋🐋"
 
             out.append(
                 {
                     "ticker": t,
                     "vol_ratio": float(vol_ratio),
-                    "change": float(ch) if ch == ch else float("nan"),
+                    "change": float(ch) if ch == ch else _NAN,
                     "dd_pct": float(dd_pct),
                     "mark": mark,
                 }
@@ -4803,8 +5476,8 @@ async def job_whale_follow(context: ContextTypes.DEFAULT_TYPE) -> None:
         if not out:
             return
 
-        out.sort(key=lambda x: (x.get("mark") == "🐋🐋", x.get("vol_ratio", 0)), reverse=True)
-        msg = build_whale_message(out[:12], xu_close, xu_change, reg)
+        top = heapq.nlargest(12, out, key=_whale_sort_key)
+        msg = build_whale_message(top, xu_close, xu_change, reg)
 
         await context.bot.send_message(
             chat_id=int(ALARM_CHAT_ID),
@@ -4885,27 +5558,20 @@ def schedule_jobs(app: Application) -> None:
             "TV SNAPSHOT kapalı veya job_queue yok -> günlük snapshot çalışmayacak."
         )
     
-    # --------------------------
-    # MOMO MODÜLLERİNİ UYGULAMAYA REGISTER ET (SAFE)
-    # --------------------------
-    try:
-        register_momo_prime(app)
-        logger.info("register_momo_prime OK")
-    except Exception as e:
-        logger.exception("register_momo_prime FAILED (safe-skip): %s", e)
-
-    try:
-        register_momo_flow(app)
-        logger.info("register_momo_flow OK")
-    except Exception as e:
-        logger.exception("register_momo_flow FAILED (safe-skip): %s", e)
+    # -------------------------
+    # RADAR snapshot repeating
+    # -------------------------
+    if RADAR_SNAPSHOT_ENABLED and RADAR_SNAPSHOT_INTERVAL_MIN > 0 and BIST200:
+        safe_run_repeating(
+            jq,
+            job_radar_snapshot,
+            interval_sec=int(RADAR_SNAPSHOT_INTERVAL_MIN) * 60,
+            first=10,
+            name="radar_snapshot_repeating",
+        )
+    else:
+        logger.info("RADAR SNAPSHOT kapalı -> /radar canlı tarama yapar.")
 
-    try:
-        register_momo_kilit(app)
-        logger.info("register_momo_kilit OK")
-    except Exception as e:
-        logger.exception("register_momo_kilit FAILED (safe-skip): %s", e)
-        
     # -----------------------------
     # MOMO PRIME BALINA (SAFE SCHEDULE) - isolated
     # -----------------------------
@@ -5349,6 +6015,11 @@ async def log_any_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 # =========================================================
 # Main
 # =========================================================
+async def _post_shutdown(app: Application) -> None:
+    # Ortak HTTP client'ları kapat (açık keep-alive bağlantıları bırakma)
+    await close_tv_client()
+
+
 def main() -> None:
     token = os.getenv("BOT_TOKEN", "").strip() or os.getenv("TELEGRAM_TOKEN", "").strip()
     if not token:
@@ -5359,7 +6030,22 @@ def main() -> None:
     load_whale_sent_day()
     load_tomorrow_chains()
 
-    app = Application.builder().token(token).build()
+    request = RateLimitedHTTPXRequest(
+        connection_pool_size=max(1, TG_POOL_SIZE),
+        connect_timeout=10.0,
+        read_timeout=TG_READ_TIMEOUT,
+    )
+    # getUpdates long-poll kendi bağlantısını kullansın, gönderim havuzunu tutmasın
+    updates_request = HTTPXRequest(connection_pool_size=1, read_timeout=TG_READ_TIMEOUT)
+
+    app = (
+        Application.builder()
+        .token(token)
+        .request(request)
+        .get_updates_request(updates_request)
+        .post_shutdown(_post_shutdown)
+        .build()
+    )
     
     logger.info("CMD logger handler loading...")
 
@@ -5383,10 +6069,28 @@ def main() -> None:
     app.add_handler(CommandHandler("eod", cmd_eod))
     app.add_handler(CommandHandler("alarm_run", cmd_alarm_run))
     app.add_handler(CommandHandler("altin_follow", cmd_altin_follow))
-    register_momo_prime(app)
-    register_momo_flow(app)
-    register_momo_kilit(app)
-    
+
+    # --------------------------
+    # MOMO MODÜLLERİNİ UYGULAMAYA REGISTER ET (SAFE, tek sefer)
+    # --------------------------
+    try:
+        register_momo_prime(app)
+        logger.info("register_momo_prime OK")
+    except Exception as e:
+        logger.exception("register_momo_prime FAILED (safe-skip): %s", e)
+
+    try:
+        register_momo_flow(app)
+        logger.info("register_momo_flow OK")
+    except Exception as e:
+        logger.exception("register_momo_flow FAILED (safe-skip): %s", e)
+
+    try:
+        register_momo_kilit(app)
+        logger.info("register_momo_kilit OK")
+    except Exception as e:
+        logger.exception("register_momo_kilit FAILED (safe-skip): %s", e)
+
     app.add_handler(
     MessageHandler(filters.COMMAND, log_any_command),
     group=99 
@@ -5404,13 +6108,32 @@ def main() -> None:
     async def post_start_bootstrap(ctx: ContextTypes.DEFAULT_TYPE) -> None:
         msg = await yahoo_bootstrap_if_needed()
         logger.info("Post-start: %s", msg)
+        # Soğuk başlangıç maliyetini ilk komut ödemesin: history JSON parse + TV client
+        try:
+            _price, _vol, days = await asyncio.to_thread(load_history_readonly)
+            _get_tv_client()
+            logger.info("Post-start warm: history days=%d", len(days))
+        except Exception as e:
+            logger.warning("Post-start warm failed: %s", e)
 
     if getattr(app, "job_queue", None) is not None:
         app.job_queue.run_once(post_start_bootstrap, when=2, name="post_start_bootstrap")
     else:
         logger.warning("JobQueue yok → post-start bootstrap çalışmaz. Gerekirse /bootstrap kullan.")
 
-    app.run_polling(drop_pending_updates=True)
+    if WEBHOOK_URL:
+        url_path = token.split(":")[-1]  # tahmin edilemez path
+        logger.info("Webhook mode: %s (port=%s)", WEBHOOK_URL, WEBHOOK_PORT)
+        app.run_webhook(
+            listen="0.0.0.0",
+            port=WEBHOOK_PORT,
+            url_path=url_path,
+            webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{url_path}",
+            secret_token=WEBHOOK_SECRET or None,
+            drop_pending_updates=True,
+        )
+    else:
+        app.run_polling(drop_pending_updates=True)
 
 if __name__ == "__main__":
     main()
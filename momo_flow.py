@@ -1,16 +1,28 @@
 import os
 import json
+import asyncio
 import time
 import hashlib
 import logging
 from datetime import datetime, timezone
-from typing import Any, Optional, List, Tuple, Dict
+from operator import itemgetter
+from typing import Any, Optional, List, Tuple
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 from telegram import Update
 from telegram.constants import ParseMode
 from telegram.ext import CommandHandler, ContextTypes, Application
 
+
+def _json_loads(raw: bytes) -> Any:
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return json.loads(raw)
+
+
 logger = logging.getLogger("MOMO_FLOW")
 
 # ==========================
@@ -27,6 +39,10 @@ FLOW_MAX_ALERTS_PER_SCAN = int(os.getenv("MOMO_FLOW_MAX_ALERTS_PER_SCAN", "3"))
 TV_SCAN_URL = os.getenv("MOMO_FLOW_TV_SCAN_URL", "https://scanner.tradingview.com/turkey/scan").strip()
 TV_TIMEOUT = int(os.getenv("MOMO_FLOW_TV_TIMEOUT", "12"))
 
+# Keep-alive Session: her taramada yeni TCP+TLS handshake olmasın
+_HTTP_SESSION = requests.Session()
+_HTTP_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0))
+
 DATA_DIR = os.getenv("DATA_DIR", "/var/data").strip() or "/var/data"
 FLOW_STATE_FILE = os.path.join(DATA_DIR, "momo_flow_state.json")
 FLOW_LAST_ALERT_FILE = os.path.join(DATA_DIR, "momo_flow_last_alert.json")
@@ -103,8 +119,8 @@ def _load_json(path: str, default: dict) -> dict:
     try:
         if not os.path.exists(path):
             return default
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(path, "rb") as f:
+            return _json_loads(f.read())
     except Exception as e:
         logger.exception("FLOW load_json error: %s", e)
         return default
@@ -197,9 +213,9 @@ def _tv_scan_rows() -> List[dict]:
             "range": [0, max(0, FLOW_TOP_N - 1)]
         }
 
-        r = requests.post(TV_SCAN_URL, json=payload, timeout=TV_TIMEOUT)
+        r = _HTTP_SESSION.post(TV_SCAN_URL, json=payload, timeout=TV_TIMEOUT)
         r.raise_for_status()
-        data = r.json() or {}
+        data = _json_loads(r.content) or {}
 
         out: List[dict] = []
         for row in data.get("data", []) or []:
@@ -252,9 +268,11 @@ def _tv_scan_rows() -> List[dict]:
 # Rolling helpers
 # ==========================
 def _safe_float(x: Any) -> Optional[float]:
+    if type(x) is float:  # TV/JSON değerleri çoğunlukla zaten float
+        return x
+    if x is None:
+        return None
     try:
-        if x is None:
-            return None
         return float(x)
     except Exception:
         return None
@@ -567,7 +585,7 @@ async def job_momo_flow_scan(context: ContextTypes.DEFAULT_TYPE) -> None:
     last_alert_by_symbol = la.get("last_alert_by_symbol") or {}
     recent = (st.get("recent") or {}).get("by_symbol") or {}
 
-    rows = _tv_scan_rows()
+    rows = await asyncio.to_thread(_tv_scan_rows)
     st["scan"]["last_scan_utc"] = _utc_now_iso()
 
     if not rows:
@@ -575,7 +593,7 @@ async def job_momo_flow_scan(context: ContextTypes.DEFAULT_TYPE) -> None:
         logger.info("FLOW: no rows")
         return
 
-    candidates: List[Tuple[str, float, float, float, float, Optional[float], str]] = []
+    candidates: List[Tuple[Tuple[int, float, float, float], str, float, float, float, float, Optional[float], str]] = []
 
     # Teşhis sayaçları
     rej_cap = 0
@@ -625,7 +643,9 @@ async def job_momo_flow_scan(context: ContextTypes.DEFAULT_TYPE) -> None:
             rej_no_level += 1
             continue
 
-        candidates.append((ticker, pct, pct_delta, vol, close, vol_spike, level))
+        # Öncelik anahtarı satır başına bir kez: (level, pct_delta, vol_spike, pct)
+        prio = (LEVEL_RANK.get(level, 0), pct_delta, vol_spike if vol_spike is not None else 0.0, pct)
+        candidates.append((prio, ticker, pct, pct_delta, vol, close, vol_spike, level))
 
     st.setdefault("recent", {})
     st["recent"]["by_symbol"] = recent
@@ -639,16 +659,10 @@ async def job_momo_flow_scan(context: ContextTypes.DEFAULT_TYPE) -> None:
         return
 
     # Priority: higher level, higher pct_delta, higher vol_spike, higher pct
-    def _prio(x: Tuple[str, float, float, float, float, Optional[float], str]) -> Tuple[int, float, float, float]:
-        _ticker, _pct, _delta, _vol, _close, _vsp, _lvl = x
-        rank = LEVEL_RANK.get(_lvl, 0)
-        vsp = _vsp if _vsp is not None else 0.0
-        return (rank, _delta, vsp, _pct)
-
-    candidates.sort(key=_prio, reverse=True)
+    candidates.sort(key=itemgetter(0), reverse=True)
 
     sent = 0
-    for (ticker, pct, pct_delta, vol, close, vol_spike, level) in candidates:
+    for (_prio, ticker, pct, pct_delta, vol, close, vol_spike, level) in candidates:
         if sent >= FLOW_MAX_ALERTS_PER_SCAN:
             break
 
@@ -1,16 +1,27 @@
 import os
 import json
+import asyncio
 import time
 import hashlib
 import logging
 from datetime import datetime, timezone
-from typing import Optional, List, Tuple, Dict
+from typing import Any, Optional, List, Tuple, Dict
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 from telegram import Update
 from telegram.constants import ParseMode
 from telegram.ext import CommandHandler, ContextTypes, Application
 
+
+def _json_loads(raw: bytes) -> Any:
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return json.loads(raw)
+
+
 logger = logging.getLogger("MOMO_KILIT")
 
 # ==========================
@@ -29,6 +40,10 @@ MOMO_KILIT_WINDOW_MIN = int(os.getenv("MOMO_KILIT_WINDOW_MIN", "15"))
 TV_SCAN_URL = os.getenv("MOMO_KILIT_TV_SCAN_URL", "https://scanner.tradingview.com/turkey/scan").strip()
 TV_TIMEOUT = int(os.getenv("MOMO_KILIT_TV_TIMEOUT", "12"))
 
+# Keep-alive Session: her taramada yeni TCP+TLS handshake olmasın
+_HTTP_SESSION = requests.Session()
+_HTTP_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0))
+
 DATA_DIR = os.getenv("DATA_DIR", "/var/data").strip() or "/var/data"
 
 KILIT_STATE_FILE = os.path.join(DATA_DIR, "momo_kilit_state.json")
@@ -67,8 +82,8 @@ def _load_json(path: str, default: dict) -> dict:
     try:
         if not os.path.exists(path):
             return default
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(path, "rb") as f:
+            return _json_loads(f.read())
     except Exception as e:
         logger.exception("KILIT load_json error: %s", e)
         return default
@@ -219,9 +234,9 @@ def _tv_scan_rows_for_symbols(symbols: List[str]) -> List[dict]:
     }
 
     try:
-        r = requests.post(TV_SCAN_URL, json=payload, timeout=TV_TIMEOUT)
+        r = _HTTP_SESSION.post(TV_SCAN_URL, json=payload, timeout=TV_TIMEOUT)
         r.raise_for_status()
-        data = r.json() or {}
+        data = _json_loads(r.content) or {}
         out: List[dict] = []
 
         for row in data.get("data", []) or []:
@@ -615,7 +630,7 @@ async def job_momo_kilit_scan(context: ContextTypes.DEFAULT_TYPE) -> None:
     last_alert_by_symbol = la.get("last_alert_by_symbol") or {}
     history = (st.get("history") or {})
 
-    rows = _tv_scan_rows_for_symbols(watch_syms)
+    rows = await asyncio.to_thread(_tv_scan_rows_for_symbols, watch_syms)
 
     st["scan"]["last_scan_utc"] = _utc_now_iso()
     _save_json(KILIT_STATE_FILE, st)
@@ -1,17 +1,27 @@
 import os
 import json
+import asyncio
 import time
-import math
 import hashlib
 import logging
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional, List, Tuple
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 from telegram import Update
 from telegram.constants import ParseMode
 from telegram.ext import CommandHandler, ContextTypes, Application
 
+
+def _json_loads(raw: bytes) -> Any:
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return json.loads(raw)
+
+
 logger = logging.getLogger("MOMO_PRIME")
 
 # ==========================
@@ -38,8 +48,13 @@ TV_TIMEOUT = int(os.getenv("MOMO_PRIME_TV_TIMEOUT", "12"))
 
 # Yahoo (only for averages/position windows)
 YAHOO_TIMEOUT = int(os.getenv("MOMO_PRIME_YAHOO_TIMEOUT", "12"))
+
 YAHOO_SUFFIX = os.getenv("MOMO_PRIME_YAHOO_SUFFIX", ".IS").strip()  # BIST
 
+# Keep-alive Session (TV + Yahoo): her taramada yeni TCP+TLS handshake olmasın
+_HTTP_SESSION = requests.Session()
+_HTTP_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0))
+
 # Rate-limit protections
 MOMO_PRIME_YAHOO_MAX_PER_SCAN = int(os.getenv("MOMO_PRIME_YAHOO_MAX_PER_SCAN", "3"))
 MOMO_PRIME_YAHOO_BLOCK_SEC = int(os.getenv("MOMO_PRIME_YAHOO_BLOCK_SEC", "900"))  # 15 min
@@ -69,8 +84,8 @@ def _prime_watchlist_load() -> dict:
     try:
         if not os.path.exists(PRIME_WATCHLIST_FILE):
             return _prime_watchlist_default()
-        with open(PRIME_WATCHLIST_FILE, "r", encoding="utf-8") as f:
-            d = json.load(f) or {}
+        with open(PRIME_WATCHLIST_FILE, "rb") as f:
+            d = _json_loads(f.read()) or {}
         if "symbols" not in d:
             d["symbols"] = []
         return d
@@ -110,9 +125,7 @@ def prime_watchlist_add(symbol: str) -> None:
 
     if s in syms:
         syms = [x for x in syms if x != s]
-        syms.insert(0, s)
-    else:
-        syms.insert(0, s)
+    syms.insert(0, s)
 
     if len(syms) > PRIME_WATCHLIST_MAX:
         syms = syms[:PRIME_WATCHLIST_MAX]
@@ -176,7 +189,7 @@ def prime_watchlist_peek(limit: int = 25) -> List[str]:
 
 
 # Small caches (RAM)
-_YAHOO_CACHE: Dict[str, Dict[str, Any]] = {}
+_YAHOO_CACHE: Dict[str, Tuple[float, dict]] = {}  # symbol -> (monotonic ts, data)
 _YAHOO_CACHE_TTL = int(os.getenv("MOMO_PRIME_YAHOO_CACHE_TTL", "1800"))  # 30 min
 
 # Global Yahoo backoff (in-memory)
@@ -190,8 +203,8 @@ def _load_json(path: str, default: dict) -> dict:
     try:
         if not os.path.exists(path):
             return default
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(path, "rb") as f:
+            return _json_loads(f.read())
     except Exception as e:
         logger.exception("PRIME load_json error: %s", e)
         return default
@@ -223,15 +236,15 @@ def _parse_utc_iso(s: Optional[str]) -> Optional[float]:
 
 
 def _safe_float(x: Any) -> Optional[float]:
-    try:
+    if type(x) is not float:
         if x is None:
             return None
-        v = float(x)
-        if math.isnan(v) or math.isinf(v):
+        try:
+            x = float(x)
+        except Exception:
             return None
-        return v
-    except Exception:
-        return None
+    # x - x: NaN ve ±inf için NaN olur → isnan + isinf yerine tek karşılaştırma
+    return x if x - x == 0 else None
 
 
 # ==========================
@@ -295,7 +308,10 @@ def _cooldown_ok(last_alert_ts: Optional[float], now_ts: float, cooldown_sec: in
 
 def _pct_position(close: float, low: float, high: float) -> Optional[float]:
     try:
-        if any(map(lambda v: v is None or (isinstance(v, float) and math.isnan(v)), [close, low, high])):
+        # Geçici liste + lambda yerine düz kontroller; x != x yalnız NaN için True
+        if close is None or low is None or high is None:
+            return None
+        if close != close or low != low or high != high:
             return None
         if high <= low:
             return None
@@ -334,9 +350,9 @@ def _tv_scan_rows() -> List[dict]:
         "range": [0, 200]
     }
     try:
-        r = requests.post(TV_SCAN_URL, json=payload, timeout=TV_TIMEOUT)
+        r = _HTTP_SESSION.post(TV_SCAN_URL, json=payload, timeout=TV_TIMEOUT)
         r.raise_for_status()
-        data = r.json() or {}
+        data = _json_loads(r.content) or {}
 
         out: List[dict] = []
         for row in data.get("data", []) or []:
@@ -383,10 +399,10 @@ def _yahoo_chart(symbol: str) -> Optional[dict]:
     if not _yahoo_allowed_now():
         return None
 
-    now = time.time()
+    now = time.monotonic()
     cached = _YAHOO_CACHE.get(symbol)
-    if cached and (now - cached.get("ts", 0)) < _YAHOO_CACHE_TTL:
-        return cached.get("data")
+    if cached and (now - cached[0]) < _YAHOO_CACHE_TTL:
+        return cached[1]
 
     url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
     params = {
@@ -396,7 +412,7 @@ def _yahoo_chart(symbol: str) -> Optional[dict]:
         "events": "div,splits"
     }
     try:
-        r = requests.get(url, params=params, timeout=YAHOO_TIMEOUT)
+        r = _HTTP_SESSION.get(url, params=params, timeout=YAHOO_TIMEOUT)
 
         if r.status_code == 429:
             _yahoo_block_now()
@@ -404,8 +420,8 @@ def _yahoo_chart(symbol: str) -> Optional[dict]:
             return None
 
         r.raise_for_status()
-        js = r.json() or {}
-        _YAHOO_CACHE[symbol] = {"ts": now, "data": js}
+        js = _json_loads(r.content) or {}
+        _YAHOO_CACHE[symbol] = (now, js)
         return js
     except Exception as e:
         try:
@@ -756,7 +772,7 @@ async def job_momo_prime_scan(context: ContextTypes.DEFAULT_TYPE) -> None:
     # snapshot watchlist once per scan (fast + consistent)
     wl_now = set(prime_watchlist_peek(200))
 
-    rows = _tv_scan_rows()
+    rows = await asyncio.to_thread(_tv_scan_rows)
     st["scan"]["last_scan_utc"] = _utc_now_iso()
     _save_json(PRIME_STATE_FILE, st)
 
@@ -807,7 +823,7 @@ async def job_momo_prime_scan(context: ContextTypes.DEFAULT_TYPE) -> None:
         p6 = None
 
         if _yahoo_allowed_now() and yahoo_used < MOMO_PRIME_YAHOO_MAX_PER_SCAN:
-            metrics = _compute_prime_metrics(ticker, today_vol)
+            metrics = await asyncio.to_thread(_compute_prime_metrics, ticker, today_vol)
             yahoo_used += 1
             if metrics:
                 yahoo_ok = True
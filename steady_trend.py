@@ -1,15 +1,27 @@
 import os
 import json
+import asyncio
 import time
-import math
 import hashlib
 import logging
 import inspect
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 from typing import Dict, Any, List, Optional
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+
+
+def _json_loads(raw: bytes) -> Any:
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return json.loads(raw)
+
 
 logger = logging.getLogger("STEADY_TREND")
 
@@ -40,15 +52,15 @@ def _env_float(name: str, default: float) -> float:
 
 
 def _safe_float(x: Any) -> Optional[float]:
-    try:
+    if type(x) is not float:
         if x is None:
             return None
-        v = float(x)
-        if math.isnan(v) or math.isinf(v):
+        try:
+            x = float(x)
+        except Exception:
             return None
-        return v
-    except Exception:
-        return None
+    # x - x: NaN ve ±inf için NaN olur → isnan + isinf yerine tek karşılaştırma
+    return x if x - x == 0 else None
 
 
 def _utc_now_iso() -> str:
@@ -169,11 +181,18 @@ STEADY_TREND_DRY_RUN_TAG = _env_bool("STEADY_TREND_DRY_RUN_TAG", False)
 TV_SCAN_URL = os.getenv("STEADY_TREND_TV_SCAN_URL", "https://scanner.tradingview.com/turkey/scan").strip()
 TV_TIMEOUT = _env_int("STEADY_TREND_TV_TIMEOUT", 12)
 
+# Keep-alive Session: her taramada yeni TCP+TLS handshake olmasın
+_HTTP_SESSION = requests.Session()
+_HTTP_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0))
+
 # Chunk/batch (ban/rate-limit azaltır)
 STEADY_TV_BATCH_SIZE = _env_int("STEADY_TV_BATCH_SIZE", 80)
 STEADY_TV_BATCH_SLEEP_MS = _env_int("STEADY_TV_BATCH_SLEEP_MS", 350)
 STEADY_TV_RETRY = _env_int("STEADY_TV_RETRY", 2)
 STEADY_TV_RETRY_SLEEP_MS = _env_int("STEADY_TV_RETRY_SLEEP_MS", 700)
+# Opt-in: >1 ise batch'ler aynı anda (keep-alive havuzu üstünden) gider.
+# STEADY_TV_BATCH_SLEEP_MS sadece sıralı yolda (1, varsayılan) uygulanır; paralelde pacing yok.
+STEADY_TV_PARALLEL = _env_int("STEADY_TV_PARALLEL", 1)
 
 # Universe tickers
 STEADY_UNIVERSE_TICKERS = os.getenv("STEADY_UNIVERSE_TICKERS", "").strip()
@@ -214,8 +233,8 @@ def _load_json(path: str, default: dict) -> dict:
     try:
         if not os.path.exists(path):
             return default
-        with open(path, "r", encoding="utf-8") as f:
-            d = json.load(f) or {}
+        with open(path, "rb") as f:
+            d = _json_loads(f.read()) or {}
         return d if isinstance(d, dict) else default
     except Exception as e:
         logger.warning("STEADY_TREND load_json error: %s", e)
@@ -266,9 +285,9 @@ def _tv_scan_with_retry(payload: dict) -> dict:
     last_err: Optional[Exception] = None
     for i in range(max(0, STEADY_TV_RETRY) + 1):
         try:
-            r = requests.post(TV_SCAN_URL, json=payload, timeout=TV_TIMEOUT)
+            r = _HTTP_SESSION.post(TV_SCAN_URL, json=payload, timeout=TV_TIMEOUT)
             r.raise_for_status()
-            return r.json() or {}
+            return _json_loads(r.content) or {}
         except Exception as e:
             last_err = e
             if i < STEADY_TV_RETRY:
@@ -344,15 +363,32 @@ def _tv_scan_for_tickers_batch(tickers: List[str]) -> List[Dict[str, Any]]:
 
 
 def _tv_scan_for_tickers_chunked(tickers: List[str]) -> List[Dict[str, Any]]:
-    t = [_norm_symbol(x) for x in (tickers or [])]
-    t = [x for x in t if x]
+    t = [x for x in map(_norm_symbol, tickers or []) if x]
     if not t:
         return []
 
     batch_size = max(10, int(STEADY_TV_BATCH_SIZE))
     all_rows: List[Dict[str, Any]] = []
 
-    batches = [t[i:i + batch_size] for i in range(0, len(t), batch_size)]
+    # Parça sayısı aritmetikle; parçalar ihtiyaç anında kesilir (önceden liste-of-liste yok)
+    n_batches = (len(t) + batch_size - 1) // batch_size
+    batches = (t[i:i + batch_size] for i in range(0, len(t), batch_size))
+
+    workers = min(n_batches, max(1, int(STEADY_TV_PARALLEL)))
+    if workers > 1:
+        def _safe_batch(b: List[str]) -> List[Dict[str, Any]]:
+            try:
+                return _tv_scan_for_tickers_batch(b)
+            except Exception as e:
+                logger.warning("STEADY_TREND: TV batch scan error: %s", e)
+                return []
+
+        # map sırayı korur: sonuç sıralı döngüyle aynı
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            for rows in ex.map(_safe_batch, batches):
+                all_rows.extend(rows)
+        return all_rows
+
     for i, b in enumerate(batches):
         try:
             rows = _tv_scan_for_tickers_batch(b)
@@ -360,7 +396,7 @@ def _tv_scan_for_tickers_chunked(tickers: List[str]) -> List[Dict[str, Any]]:
         except Exception as e:
             logger.warning("STEADY_TREND: TV batch scan error: %s", e)
 
-        if i < (len(batches) - 1) and STEADY_TV_BATCH_SLEEP_MS > 0:
+        if i < (n_batches - 1) and STEADY_TV_BATCH_SLEEP_MS > 0:
             time.sleep(float(STEADY_TV_BATCH_SLEEP_MS) / 1000.0)
 
     return all_rows
@@ -761,12 +797,12 @@ async def steady_trend_job(ctx, bist_open_fn, fetch_rows_fn, telegram_send_fn) -
         return
 
     # TV scan (chunked) -> artık SADECE scan_universe taranıyor
-    tv_rows = _tv_scan_for_tickers_chunked(scan_universe)
+    tv_rows = await asyncio.to_thread(_tv_scan_for_tickers_chunked, scan_universe)
     if not tv_rows:
         return
 
     # TV scan
-    tv_rows = _tv_scan_for_tickers_chunked(universe)
+    tv_rows = await asyncio.to_thread(_tv_scan_for_tickers_chunked, universe)
     if not tv_rows:
         logger.info("STEADY exit: tv_rows empty")
         return
@@ -812,7 +848,8 @@ async def steady_trend_job(ctx, bist_open_fn, fetch_rows_fn, telegram_send_fn) -
         logger.info("STEADY: no picks")
         return
 
-    picks.sort(key=lambda x: float(x.get("steady_score") or 0.0), reverse=True)
+    # steady_score yukarıda float olarak yazıldı; tekrar parse etmeden sırala
+    picks.sort(key=itemgetter("steady_score"), reverse=True)
 
     max_per_tick = max(0, int(STEADY_MAX_PER_TICK))
     if max_per_tick == 0:
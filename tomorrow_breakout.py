@@ -1,10 +1,13 @@
-from typing import Any, Dict, List, Optional
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Tuple
 
 
 def _safe_float(x: Any) -> Optional[float]:
+    if type(x) is float:  # TV/JSON değerleri çoğunlukla zaten float
+        return x
+    if x is None:
+        return None
     try:
-        if x is None:
-            return None
         return float(x)
     except Exception:
         return None
@@ -93,7 +96,7 @@ def build_breakout_ready_list(
     min_volume_ratio: float = 1.25,
     min_continuity: int = 3,
 ) -> List[Dict[str, Any]]:
-    out: List[Dict[str, Any]] = []
+    keyed: List[Tuple[Tuple[float, int], Dict[str, Any]]] = []
 
     for row in rows or []:
         if is_breakout_ready(
@@ -103,16 +106,16 @@ def build_breakout_ready_list(
             min_volume_ratio=min_volume_ratio,
             min_continuity=min_continuity,
         ):
-            out.append(dict(row))
-
-    out.sort(
-        key=lambda x: (
-            _safe_float(x.get("volume_ratio")) or 0.0,
-            _safe_int(x.get("continuity"), 0),
-        ),
-        reverse=True,
-    )
-    return out
+            # sıralama anahtarı bir kez; sort sırasında tekrar parse edilmez
+            key = (
+                _safe_float(row.get("volume_ratio")) or 0.0,
+                _safe_int(row.get("continuity"), 0),
+            )
+            keyed.append((key, row))
+
+    keyed.sort(key=itemgetter(0), reverse=True)
+    # kopya sadece seçilen satırlar için, sıralamadan sonra
+    return [dict(r) for _, r in keyed]
     
 def compute_breakout_score(
     row: Dict[str, Any],
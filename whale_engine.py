@@ -1,13 +1,24 @@
 import os
 import json
+import asyncio
 import time
-import math
 import hashlib
 import logging
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Any, Dict, Optional, List, Tuple
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+
+
+def _json_loads(raw: bytes) -> Any:
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return json.loads(raw)
+
 
 logger = logging.getLogger("WHALE_ENGINE")
 
@@ -36,15 +47,15 @@ def _env_float(name: str, default: float) -> float:
 
 
 def _safe_float(x: Any) -> Optional[float]:
-    try:
+    if type(x) is not float:
         if x is None:
             return None
-        v = float(x)
-        if math.isnan(v) or math.isinf(v):
+        try:
+            x = float(x)
+        except Exception:
             return None
-        return v
-    except Exception:
-        return None
+    # x - x: NaN ve ±inf için NaN olur → isnan + isinf yerine tek karşılaştırma
+    return x if x - x == 0 else None
 
 
 def _utc_now_iso() -> str:
@@ -59,8 +70,8 @@ def _load_json(path: str, default: dict) -> dict:
     try:
         if not os.path.exists(path):
             return default
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f) or default
+        with open(path, "rb") as f:
+            return _json_loads(f.read()) or default
     except Exception as e:
         logger.warning("WHALE load_json error: %s", e)
         return default
@@ -125,6 +136,10 @@ WHALE_MSG_MAX_LINES = _env_int("WHALE_MSG_MAX_LINES", 3)
 TV_SCAN_URL = os.getenv("WHALE_TV_SCAN_URL", "https://scanner.tradingview.com/turkey/scan").strip()
 TV_TIMEOUT = _env_int("WHALE_TV_TIMEOUT", 12)
 
+# Keep-alive Session: her taramada yeni TCP+TLS handshake olmasın
+_HTTP_SESSION = requests.Session()
+_HTTP_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0))
+
 # Universe tickers (env)
 UNIVERSE_TICKERS = os.getenv("UNIVERSE_TICKERS", "").strip()
 if not UNIVERSE_TICKERS:
@@ -223,8 +238,8 @@ def _wl_load() -> dict:
     try:
         if not os.path.exists(PRIME_WATCHLIST_FILE):
             return _wl_default()
-        with open(PRIME_WATCHLIST_FILE, "r", encoding="utf-8") as f:
-            d = json.load(f) or {}
+        with open(PRIME_WATCHLIST_FILE, "rb") as f:
+            d = _json_loads(f.read()) or {}
         if "symbols" not in d:
             d["symbols"] = []
         return d
@@ -273,13 +288,13 @@ def _tv_scan(payload: dict, tag: str) -> List[Dict[str, Any]]:
         if WHALE_DEBUG_LOG and WHALE_LOG_SCAN:
             logger.info("WHALE TV SCAN START tag=%s url=%s timeout=%s", tag, TV_SCAN_URL, TV_TIMEOUT)
 
-        r = requests.post(TV_SCAN_URL, json=payload, timeout=TV_TIMEOUT)
+        r = _HTTP_SESSION.post(TV_SCAN_URL, json=payload, timeout=TV_TIMEOUT)
 
         if WHALE_DEBUG_LOG and WHALE_LOG_SCAN:
             logger.info("WHALE TV SCAN HTTP tag=%s status=%s", tag, r.status_code)
 
         r.raise_for_status()
-        js = r.json() or {}
+        js = _json_loads(r.content) or {}
 
         data = js.get("data") or []
         if WHALE_DEBUG_LOG and WHALE_LOG_SCAN:
@@ -384,9 +399,15 @@ def _tv_universe_rows(tickers: List[str]) -> List[Dict[str, Any]]:
 
 
 def _parse_universe_env(raw: str) -> List[str]:
-    raw = (raw or "").strip()
+    # UNIVERSE_TICKERS process boyunca sabit: her taramada yeniden parse etme
+    return list(_parse_universe_cached(raw or ""))
+
+
+@lru_cache(maxsize=8)
+def _parse_universe_cached(raw: str) -> Tuple[str, ...]:
+    raw = raw.strip()
     if not raw:
-        return []
+        return ()
 
     parts = [p.strip() for p in raw.replace("\n", ",").split(",") if p.strip()]
     out: List[str] = []
@@ -401,7 +422,7 @@ def _parse_universe_env(raw: str) -> List[str]:
         seen.add(norm)
         out.append(norm)
 
-    return out
+    return tuple(out)
 
 
 # =========================================================
@@ -706,13 +727,13 @@ async def job_whale_engine_scan(context) -> None:
             pass
 
     st = _load_json(WHALE_STATE_FILE, _default_whale_state())
-    prev_map_before = dict(st.get("prev") or {})
+    prev_map_before = st.get("prev") or {}  # sadece okunur; st["prev"] aşağıda yenisiyle değişir
 
     la = _load_json(WHALE_LAST_ALERT_FILE, _default_last_alert())
     last_map = la.get("last_alert_by_symbol") or {}
 
     # Layer 1 (ham erken uyarı havuzu)
-    l1_rows = _tv_topn_rows(WHALE_TOPN)
+    l1_rows = await asyncio.to_thread(_tv_topn_rows, WHALE_TOPN)
     if WHALE_LOG_SCAN and WHALE_DEBUG_LOG:
         logger.info("WHALE rows_len TOPN=%s -> %s", WHALE_TOPN, len(l1_rows))
 
@@ -726,7 +747,7 @@ async def job_whale_engine_scan(context) -> None:
 
     # Layer 2 (kontrollü evren)
     universe = _parse_universe_env(UNIVERSE_TICKERS)
-    l2_rows = _tv_universe_rows(universe) if universe else []
+    l2_rows = await asyncio.to_thread(_tv_universe_rows, universe) if universe else []
     if WHALE_LOG_SCAN and WHALE_DEBUG_LOG:
         logger.info("WHALE rows_len UNIVERSE=%s -> %s", len(universe), len(l2_rows))
 
@@ -735,18 +756,15 @@ async def job_whale_engine_scan(context) -> None:
         logger.info("WHALE cand_len L2=%s", len(l2_candidates))
 
     # Merge (L2 overwrite, EARLY fills gaps)
-    merged: Dict[str, Dict[str, Any]] = {}
+    # Önce sadece (satır, katman) referansı; L2'nin ezdiği L1 satırları boşuna kopyalanmasın
+    picked: Dict[str, Tuple[Dict[str, Any], str]] = {}
     for r in l1_candidates:
-        merged[r["symbol"]] = dict(r)
-        merged[r["symbol"]]["layer"] = "L1"
+        picked[r["symbol"]] = (r, "L1")
     for r in l2_candidates:
-        merged[r["symbol"]] = dict(r)
-        merged[r["symbol"]]["layer"] = "L2"
+        picked[r["symbol"]] = (r, "L2")
     for r in early_candidates:
-        sym = r["symbol"]
-        if sym not in merged:
-            merged[sym] = dict(r)
-            merged[sym]["layer"] = "E"
+        picked.setdefault(r["symbol"], (r, "E"))
+    merged: Dict[str, Dict[str, Any]] = {sym: {**r, "layer": layer} for sym, (r, layer) in picked.items()}
 
     if not merged:
         if WHALE_LOG_SCAN and WHALE_DEBUG_LOG: